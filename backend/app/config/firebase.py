@@ -1,77 +1,131 @@
 import firebase_admin
 from firebase_admin import credentials, auth, firestore
 from app.config.settings import settings
+import functools
 import json
+import logging
 import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=1)
+def _load_credentials() -> credentials.Certificate:
+    """
+    Load Firebase service account credentials
+
+    Cached so the service account is only read and its PEM key parsed once
+    per process.
+
+    Returns:
+        Firebase credentials certificate
+
+    Raises:
+        ValueError: If no Firebase credentials are configured
+    """
+    # Try to use service account file if provided
+    if settings.FIREBASE_CREDENTIALS_PATH and os.path.exists(settings.FIREBASE_CREDENTIALS_PATH):
+        logger.info("Using Firebase service account file")
+        return credentials.Certificate(settings.FIREBASE_CREDENTIALS_PATH)
+
+    # Otherwise, use environment variables
+    if settings.FIREBASE_PROJECT_ID and settings.FIREBASE_PRIVATE_KEY:
+        # Construct service account dictionary from environment variables
+        service_account_info = {
+            "type": "service_account",
+            "project_id": settings.FIREBASE_PROJECT_ID,
+            "private_key_id": settings.FIREBASE_PRIVATE_KEY_ID,
+            "private_key": settings.FIREBASE_PRIVATE_KEY,
+            "client_email": settings.FIREBASE_CLIENT_EMAIL,
+            "client_id": settings.FIREBASE_CLIENT_ID,
+            "auth_uri": settings.FIREBASE_AUTH_URI,
+            "token_uri": settings.FIREBASE_TOKEN_URI,
+            "auth_provider_x509_cert_url": settings.FIREBASE_AUTH_PROVIDER_CERT_URL,
+            "client_x509_cert_url": settings.FIREBASE_CLIENT_CERT_URL,
+        }
+        logger.info("Using Firebase credentials from environment variables")
+        return credentials.Certificate(service_account_info)
+
+    raise ValueError(
+        "Firebase credentials not found. Please provide either "
+        "FIREBASE_CREDENTIALS_PATH or Firebase environment variables."
+    )
 
 
 class FirebaseClient:
     """Firebase Admin SDK client wrapper"""
 
-    _instance = None
-    _db = None
-
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(FirebaseClient, cls).__new__(cls)
-            cls._instance._initialize()
-        return cls._instance
+    def __init__(self):
+        self._db = None
+        self._users = None
+        self._email_index = None
+        self._initialized = False
+        self._init_lock = threading.Lock()
+
+    def _ensure_initialized(self):
+        """Initialize Firebase Admin SDK on first use rather than at import"""
+        if not self._initialized:
+            # Blocking calls run in executor threads, so guard the first use
+            with self._init_lock:
+                if not self._initialized:
+                    self._initialize()
 
     def _initialize(self):
         """Initialize Firebase Admin SDK"""
         try:
             # Check if Firebase app is already initialized
             if not firebase_admin._apps:
-                # Try to use service account file if provided
-                if settings.FIREBASE_CREDENTIALS_PATH and os.path.exists(settings.FIREBASE_CREDENTIALS_PATH):
-                    cred = credentials.Certificate(settings.FIREBASE_CREDENTIALS_PATH)
-                    firebase_admin.initialize_app(cred)
-                    print("Firebase initialized with service account file")
-                # Otherwise, use environment variables
-                elif settings.FIREBASE_PROJECT_ID and settings.FIREBASE_PRIVATE_KEY:
-                    # Construct service account dictionary from environment variables
-                    service_account_info = {
-                        "type": "service_account",
-                        "project_id": settings.FIREBASE_PROJECT_ID,
-                        "private_key_id": settings.FIREBASE_PRIVATE_KEY_ID,
-                        "private_key": settings.FIREBASE_PRIVATE_KEY.replace("\\n", "\n"),
-                        "client_email": settings.FIREBASE_CLIENT_EMAIL,
-                        "client_id": settings.FIREBASE_CLIENT_ID,
-                        "auth_uri": settings.FIREBASE_AUTH_URI,
-                        "token_uri": settings.FIREBASE_TOKEN_URI,
-                        "auth_provider_x509_cert_url": settings.FIREBASE_AUTH_PROVIDER_CERT_URL,
-                        "client_x509_cert_url": settings.FIREBASE_CLIENT_CERT_URL,
-                    }
-                    cred = credentials.Certificate(service_account_info)
-                    firebase_admin.initialize_app(cred)
-                    print("Firebase initialized with environment variables")
-                else:
-                    raise ValueError(
-                        "Firebase credentials not found. Please provide either "
-                        "FIREBASE_CREDENTIALS_PATH or Firebase environment variables."
-                    )
+                firebase_admin.initialize_app(_load_credentials())
+                logger.info("Firebase initialized successfully")
 
             # Initialize Firestore client
             self._db = firestore.client()
-            print("Firestore client initialized successfully")
+            self._initialized = True
+            logger.info("Firestore client initialized successfully")
 
         except Exception as e:
-            print(f"Error initializing Firebase: {str(e)}")
+            logger.error("Error initializing Firebase: %s", e)
             raise
 
     @property
     def db(self):
         """Get Firestore database client"""
-        if self._db is None:
-            self._db = firestore.client()
+        self._ensure_initialized()
         return self._db
 
+    @property
+    def users(self):
+        """Get the users collection reference (built once)"""
+        if self._users is None:
+            self._users = self.db.collection(settings.FIRESTORE_COLLECTION_USERS)
+        return self._users
+
+    @property
+    def email_index(self):
+        """Get the email index collection reference (built once)"""
+        if self._email_index is None:
+            self._email_index = self.db.collection(settings.FIRESTORE_COLLECTION_EMAIL_INDEX)
+        return self._email_index
+
+    def warm_up(self):
+        """
+        Open the Firestore gRPC channel ahead of the first request
+
+        The underlying API client and channel are created lazily on the first
+        call, so issue a cheap query at startup instead of paying the
+        connection setup on a user request.
+        """
+        self.db.collection("_warmup").limit(1).get()
+
     def get_auth(self):
         """Get Firebase Auth instance"""
+        self._ensure_initialized()
         return auth
 
     def verify_id_token(self, id_token: str):
         """Verify Firebase ID token"""
+        self._ensure_initialized()
         try:
             decoded_token = auth.verify_id_token(id_token)
             return decoded_token
@@ -80,6 +134,7 @@ class FirebaseClient:
 
     def get_user(self, uid: str):
         """Get user by UID"""
+        self._ensure_initialized()
         try:
             return auth.get_user(uid)
         except Exception as e:
@@ -87,6 +142,7 @@ class FirebaseClient:
 
     def create_user(self, email: str, password: str = None, display_name: str = None, **kwargs):
         """Create a new Firebase user"""
+        self._ensure_initialized()
         try:
             user_params = {
                 "email": email,
@@ -108,6 +164,7 @@ class FirebaseClient:
 
     def update_user(self, uid: str, **kwargs):
         """Update user information"""
+        self._ensure_initialized()
         try:
             return auth.update_user(uid, **kwargs)
         except Exception as e:
@@ -115,14 +172,36 @@ class FirebaseClient:
 
     def delete_user(self, uid: str):
         """Delete a user"""
+        self._ensure_initialized()
         try:
             auth.delete_user(uid)
             return True
         except Exception as e:
             raise ValueError(f"Error deleting user: {str(e)}")
 
+    def get_users_by_email(self, emails: list):
+        """Get the users with the given emails in one call (at most 100)"""
+        self._ensure_initialized()
+        try:
+            identifiers = [auth.EmailIdentifier(email) for email in emails]
+            return auth.get_users(identifiers).users
+        except Exception as e:
+            raise ValueError(f"Error getting users: {str(e)}")
+
+    def delete_users(self, uids: list):
+        """Delete several users in one call (at most 1000)"""
+        self._ensure_initialized()
+        try:
+            result = auth.delete_users(uids)
+            if result.failure_count:
+                raise ValueError(f"{result.failure_count} of {len(uids)} users could not be deleted")
+            return True
+        except Exception as e:
+            raise ValueError(f"Error deleting users: {str(e)}")
+
     def generate_email_verification_link(self, email: str):
         """Generate email verification link"""
+        self._ensure_initialized()
         try:
             link = auth.generate_email_verification_link(
                 email,
@@ -134,6 +213,7 @@ class FirebaseClient:
 
     def generate_password_reset_link(self, email: str):
         """Generate password reset link"""
+        self._ensure_initialized()
         try:
             link = auth.generate_password_reset_link(
                 email,
@@ -144,5 +224,11 @@ class FirebaseClient:
             raise ValueError(f"Error generating password reset link: {str(e)}")
 
 
-# Create singleton instance
-firebase_client = FirebaseClient()
+@functools.lru_cache(maxsize=1)
+def get_firebase_client() -> FirebaseClient:
+    """Get the shared Firebase client instance"""
+    return FirebaseClient()
+
+
+# Shared instance (the SDK itself is initialized on first use)
+firebase_client = get_firebase_client()
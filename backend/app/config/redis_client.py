@@ -0,0 +1,21 @@
+from app.config.settings import settings
+
+_client = None
+
+
+def get_redis():
+    """
+    Get the shared async Redis client, or None if REDIS_URL is not set
+
+    Redis is optional. When configured it shares the token blacklist and
+    user cache invalidations between workers.
+    """
+    global _client
+
+    if not settings.REDIS_URL:
+        return None
+    if _client is None:
+        import redis.asyncio as redis
+
+        _client = redis.from_url(settings.REDIS_URL)
+    return _client
@@ -1,5 +1,7 @@
-from pydantic_settings import BaseSettings
-from typing import List
+from pydantic import field_validator
+from pydantic_settings import BaseSettings, SettingsConfigDict
+from functools import cached_property
+from typing import Tuple
 import os
 
 
@@ -33,6 +35,12 @@ class Settings(BaseSettings):
     FIREBASE_CLIENT_CERT_URL: str = ""
     FIREBASE_CREDENTIALS_PATH: str = ""
 
+    @field_validator("FIREBASE_PRIVATE_KEY")
+    @classmethod
+    def normalize_private_key(cls, v: str) -> str:
+        """Convert escaped newlines from .env into real newlines"""
+        return v.replace("\\n", "\n")
+
     # Google OAuth
     GOOGLE_CLIENT_ID: str = ""
     GOOGLE_CLIENT_SECRET: str = ""
@@ -46,26 +54,40 @@ class Settings(BaseSettings):
     EMAIL_FROM: str = "noreply@sehatguru.com"
     EMAIL_FROM_NAME: str = "SehatGuru"
 
+    # Test admin routes (/admin/test-setup, /admin/delete-users-batch). They
+    # create and delete arbitrary users without authentication, so they are
+    # off unless explicitly enabled for a test server
+    ENABLE_TEST_ADMIN_ROUTES: bool = False
+
+    # Redis (optional, shares the token blacklist and user cache
+    # invalidations across workers; needed with more than one worker)
+    REDIS_URL: str = ""
+
     # Frontend
     FRONTEND_URL: str = "http://localhost:3000"
 
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:3000,http://localhost:8000"
 
-    @property
-    def allowed_origins_list(self) -> List[str]:
-        return [origin.strip() for origin in self.ALLOWED_ORIGINS.split(",")]
+    @cached_property
+    def allowed_origins_list(self) -> Tuple[str, ...]:
+        return tuple(origin.strip() for origin in self.ALLOWED_ORIGINS.split(","))
 
     # Firestore Collections
     FIRESTORE_COLLECTION_USERS: str = "users"
+    FIRESTORE_COLLECTION_EMAIL_INDEX: str = "email_index"
     FIRESTORE_COLLECTION_FOOD_LOGS: str = "food_logs"
     FIRESTORE_COLLECTION_FOODS: str = "foods"
     FIRESTORE_COLLECTION_MEAL_PLANS: str = "meal_plans"
     FIRESTORE_COLLECTION_CHAT_HISTORY: str = "chat_history"
 
-    class Config:
-        env_file = ".env"
-        case_sensitive = True
+    # Settings never change at runtime, so freeze them
+    model_config = SettingsConfigDict(
+        env_file=".env",
+        case_sensitive=True,
+        extra="ignore",
+        frozen=True
+    )
 
 
 # Create settings instance
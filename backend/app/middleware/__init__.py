@@ -1,3 +1,3 @@
-from app.middleware.auth import get_current_user, get_current_active_user
+from app.middleware.auth import get_current_user, get_current_active_user, get_current_user_profile
 
-__all__ = ["get_current_user", "get_current_active_user"]
+__all__ = ["get_current_user", "get_current_active_user", "get_current_user_profile"]
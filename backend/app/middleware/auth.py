@@ -1,15 +1,42 @@
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from jose import JWTError
+import asyncio
+import functools
+import logging
+import re
+from fastapi import BackgroundTasks, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
+from jwt import PyJWTError
 from app.utils.jwt import verify_token
+from app.utils.jwt_cache import get_verified_token, cache_verified_token
 from app.config.firebase import firebase_client
 from app.models.auth import TokenData
 from app.models.token_blacklist import TokenBlacklist
+from app.security import security
+from app.utils.user_cache import (
+    get_cached_user,
+    cache_user,
+    email_recently_synced,
+    mark_email_synced
+)
 from typing import Optional
 
-# HTTP Bearer token scheme
-security = HTTPBearer()
-
+logger = logging.getLogger(__name__)
+
+# Cheap structural check run before any hashing or signature verification
+# (used with fullmatch, since "$" would also accept a trailing newline)
+_JWT_SHAPE = re.compile(r"[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]+\.[A-Za-z0-9_\-]+")
+_MAX_TOKEN_LENGTH = 4096
+
+# User document fields read by get_current_active_user and its callers;
+# the rest of the document is not fetched
+_USER_FIELDS = [
+    "email",
+    "full_name",
+    "email_verified",
+    "photo_url",
+    "created_at",
+    "password_changed_at",
+    "password_changed_at_ts",
+]
 
 async def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security)
@@ -35,25 +62,36 @@ async def get_current_user(
     try:
         token = credentials.credentials
 
+        # Reject oversized or malformed tokens without touching the blacklist
+        if len(token) > _MAX_TOKEN_LENGTH or not _JWT_SHAPE.fullmatch(token):
+            raise credentials_exception
+
         # Check if token is blacklisted (logged out)
-        if TokenBlacklist.is_blacklisted(token):
+        if await TokenBlacklist.is_blacklisted(token):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Token has been revoked. Please login again.",
                 headers={"WWW-Authenticate": "Bearer"},
             )
 
+        # Reuse a previous verification if the token has not expired yet
+        token_data = get_verified_token(token)
+        if token_data is not None:
+            return token_data
+
         # Verify JWT token
         token_data = verify_token(token, token_type="access")
 
         if token_data.uid is None:
             raise credentials_exception
 
+        cache_verified_token(token, token_data)
+
         return token_data
 
     except HTTPException:
         raise
-    except JWTError as e:
+    except PyJWTError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid token: {str(e)}",
@@ -67,15 +105,69 @@ async def get_current_user(
         )
 
 
+def _store_email_verified(user_ref, user_data: dict):
+    """Persist a changed email_verified status to Firestore"""
+    from datetime import datetime, timezone
+
+    try:
+        user_ref.update({
+            "email_verified": user_data["email_verified"],
+            "updated_at": datetime.now(timezone.utc)
+        })
+        logger.debug("Synced email_verified status for user %s: %s", user_data["uid"], user_data["email_verified"])
+    except Exception as e:
+        logger.warning("Could not sync email_verified status: %s", e)
+
+
+def _sync_email_verified(user_ref, user_data: dict):
+    """Re-check email_verified against Firebase Auth and persist any change"""
+    try:
+        firebase_email_verified = firebase_client.get_user(user_data["uid"]).email_verified
+    except Exception as e:
+        logger.warning("Could not sync email_verified status: %s", e)
+        return
+
+    if user_data.get("email_verified") != firebase_email_verified:
+        user_data["email_verified"] = firebase_email_verified
+        _store_email_verified(user_ref, user_data)
+
+
+def password_changed_after(user_data: dict, iat: float) -> bool:
+    """
+    Check if the user's password was changed after a token was issued
+
+    Both timestamps keep their sub-second part, so a token issued just
+    after a password change is still accepted.
+
+    Args:
+        user_data: User document data
+        iat: Token issued-at timestamp
+
+    Returns:
+        True if the token predates the last password change
+    """
+    password_changed_ts = user_data.get("password_changed_at_ts")
+
+    if password_changed_ts is None and user_data.get("password_changed_at"):
+        # Documents written before password_changed_at_ts was stored
+        password_changed_ts = user_data["password_changed_at"].timestamp()
+        user_data["password_changed_at_ts"] = password_changed_ts
+
+    return bool(password_changed_ts) and password_changed_ts > iat
+
+
 async def get_current_active_user(
+    background_tasks: BackgroundTasks,
     current_user: TokenData = Depends(get_current_user)
 ) -> dict:
     """
     Get current active user with full user data from Firestore
 
-    Also syncs email_verified status from Firebase Auth to Firestore
+    Also syncs email_verified status from Firebase Auth to Firestore, at
+    most every 10 minutes per user and after the response is sent.
 
     Args:
+        background_tasks: Tasks run after the response is sent
         current_user: TokenData from get_current_user dependency
 
     Returns:
@@ -84,60 +176,109 @@ async def get_current_active_user(
     Raises:
         HTTPException: If user not found or inactive
     """
-    try:
-        # Get user data from Firestore
-        from app.config.settings import settings
+    return await _load_active_user(background_tasks, current_user, refresh_unverified=False)
 
-        user_ref = firebase_client.db.collection(settings.FIRESTORE_COLLECTION_USERS).document(current_user.uid)
-        user_doc = user_ref.get()
 
-        if not user_doc.exists:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
-            )
+async def get_current_user_profile(
+    background_tasks: BackgroundTasks,
+    current_user: TokenData = Depends(get_current_user)
+) -> dict:
+    """
+    Get current active user for the profile endpoint (/me)
 
-        user_data = user_doc.to_dict()
-        user_data["uid"] = current_user.uid
+    Like get_current_active_user, but an unverified email is re-checked
+    against Firebase Auth inline, so a verification shows up on the next
+    profile request. Clients poll /me after the user clicks the link.
 
-        # Check if token was issued before password was changed (session invalidation)
-        if current_user.iat and user_data.get("password_changed_at"):
-            from datetime import datetime
+    Args:
+        background_tasks: Tasks run after the response is sent
+        current_user: TokenData from get_current_user dependency
+
+    Returns:
+        User data dictionary from Firestore
+
+    Raises:
+        HTTPException: If user not found or inactive
+    """
+    return await _load_active_user(background_tasks, current_user, refresh_unverified=True)
 
-            # Convert iat (unix timestamp) to datetime (naive UTC)
-            token_issued_at = datetime.utcfromtimestamp(current_user.iat)
-            password_changed_at = user_data.get("password_changed_at")
 
-            # Convert password_changed_at to naive datetime if it's timezone-aware
-            if hasattr(password_changed_at, 'tzinfo') and password_changed_at.tzinfo is not None:
-                password_changed_at = password_changed_at.replace(tzinfo=None)
+async def _load_active_user(
+    background_tasks: BackgroundTasks,
+    current_user: TokenData,
+    refresh_unverified: bool
+) -> dict:
+    """Load the user document and sync email_verified (see get_current_active_user)"""
+    try:
+        # Get user data from Firestore
+        user_ref = firebase_client.users.document(current_user.uid)
+
+        loop = asyncio.get_running_loop()
+        firebase_user = None
+
+        # Serve repeat requests from the short-lived user cache
+        user_data = get_cached_user(current_user.uid)
+
+        if user_data is None:
+            get_user_doc = functools.partial(user_ref.get, field_paths=_USER_FIELDS)
+
+            if email_recently_synced(current_user.uid):
+                user_doc = await loop.run_in_executor(None, get_user_doc)
+            else:
+                # The Firestore read and the Firebase Auth lookup are independent,
+                # so run them concurrently instead of back to back
+                user_doc, firebase_user = await asyncio.gather(
+                    loop.run_in_executor(None, get_user_doc),
+                    loop.run_in_executor(None, firebase_client.get_user, current_user.uid),
+                    return_exceptions=True
+                )
+                if isinstance(user_doc, Exception):
+                    raise user_doc
 
-            # If password was changed after token was issued, invalidate the session
-            if password_changed_at > token_issued_at:
+            if not user_doc.exists:
                 raise HTTPException(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
-                    detail="Your password was changed. Please login again with your new password.",
-                    headers={"WWW-Authenticate": "Bearer"},
+                    status_code=status.HTTP_404_NOT_FOUND,
+                    detail="User not found"
+                )
+
+            user_data = user_doc.to_dict()
+            user_data["uid"] = current_user.uid
+            cache_user(current_user.uid, user_data)
+
+        # Check if token was issued before password was changed (session invalidation)
+        if current_user.iat and password_changed_after(user_data, current_user.iat):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Your password was changed. Please login again with your new password.",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+
+        # Sync email_verified status from Firebase Auth. On the profile
+        # endpoint unverified users are checked inline so a verification shows
+        # up immediately; otherwise users are re-checked at most every 10
+        # minutes, after the response is sent. Firestore writes always happen
+        # in the background.
+        stored_email_verified = user_data.get("email_verified")
+
+        if refresh_unverified and firebase_user is None and not stored_email_verified:
+            try:
+                firebase_user = await loop.run_in_executor(
+                    None, firebase_client.get_user, current_user.uid
                 )
+            except Exception as e:
+                firebase_user = e
 
-        # Sync email_verified status from Firebase Auth
-        try:
-            from datetime import datetime
-
-            firebase_user = firebase_client.get_user(current_user.uid)
-            firebase_email_verified = firebase_user.email_verified
-
-            # If status is different, update Firestore
-            if user_data.get("email_verified") != firebase_email_verified:
-                user_ref.update({
-                    "email_verified": firebase_email_verified,
-                    "updated_at": datetime.utcnow()
-                })
-                user_data["email_verified"] = firebase_email_verified
-                print(f"✅ Synced email_verified status for user {current_user.uid}: {firebase_email_verified}")
-        except Exception as e:
+        if isinstance(firebase_user, Exception):
             # Don't fail the request if sync fails, just log it
-            print(f"⚠️ Warning: Could not sync email_verified status: {str(e)}")
+            logger.warning("Could not sync email_verified status: %s", firebase_user)
+        elif firebase_user is not None:
+            mark_email_synced(current_user.uid)
+            if stored_email_verified != firebase_user.email_verified:
+                user_data["email_verified"] = firebase_user.email_verified
+                background_tasks.add_task(_store_email_verified, user_ref, user_data)
+        elif not email_recently_synced(current_user.uid):
+            mark_email_synced(current_user.uid)
+            background_tasks.add_task(_sync_email_verified, user_ref, user_data)
 
         return user_data
 
@@ -184,7 +325,7 @@ async def verify_refresh_token(
 
     except HTTPException:
         raise
-    except JWTError as e:
+    except PyJWTError as e:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid refresh token: {str(e)}",
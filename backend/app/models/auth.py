@@ -1,12 +1,44 @@
-from pydantic import BaseModel, EmailStr, Field, validator
-from typing import Optional
+from pydantic import AfterValidator, BaseModel, Field, validator
+from pydantic_core import PydanticCustomError
+from typing import Annotated, List, Optional
 from datetime import datetime
+import re
+
+# Compiled once at import; used instead of EmailStr's full RFC validation.
+# Matched with fullmatch. The local part is a dot-separated run of RFC 5322
+# atext, Unicode letters included; domain labels may be Unicode (IDN) and
+# the TLD is either letters or an IDN A-label such as xn--p1ai.
+_ATEXT = r"[\w!#$%&'*+/=?^`{|}~\-]+"
+_LABEL = r"[^\W_](?:[\w\-]*[^\W_])?"
+EMAIL_REGEX = re.compile(
+    rf"{_ATEXT}(?:\.{_ATEXT})*@(?:{_LABEL}\.)+(?:[^\W\d_]{{2,}}|xn--[A-Za-z0-9\-]+)"
+)
+
+
+def _validate_email(v: str) -> str:
+    # Same error shape as EmailStr, whose context is JSON-serializable
+    if len(v) > 254:
+        raise PydanticCustomError(
+            "value_error",
+            "value is not a valid email address: {reason}",
+            {"reason": "The email address is too long."}
+        )
+    if not EMAIL_REGEX.fullmatch(v):
+        raise PydanticCustomError(
+            "value_error",
+            "value is not a valid email address: {reason}",
+            {"reason": "The email address is not valid."}
+        )
+    return v
+
+
+Email = Annotated[str, AfterValidator(_validate_email)]
 
 
 class UserRegister(BaseModel):
     """User registration model"""
     full_name: str = Field(..., min_length=2, max_length=100)
-    email: EmailStr
+    email: Email
     password: str = Field(..., min_length=6)
 
     @validator('password')
@@ -18,7 +50,7 @@ class UserRegister(BaseModel):
 
 class UserLogin(BaseModel):
     """User login model"""
-    email: EmailStr
+    email: Email
     password: str
 
 
@@ -30,12 +62,18 @@ class Token(BaseModel):
     expires_in: int
 
 
+class TestUserResponse(Token):
+    """Tokens for a freshly created test user (development only)"""
+    uid: str
+
+
 class TokenData(BaseModel):
     """Token payload data"""
     uid: str
     email: Optional[str] = None
     token_type: str  # "access" or "refresh"
-    iat: Optional[int] = None  # Issued at timestamp (for session invalidation)
+    iat: Optional[float] = None  # Issued at timestamp (for session invalidation)
+    exp: Optional[int] = None  # Expiration timestamp
 
 
 class GoogleAuthRequest(BaseModel):
@@ -45,7 +83,7 @@ class GoogleAuthRequest(BaseModel):
 
 class PasswordResetRequest(BaseModel):
     """Password reset request model"""
-    email: EmailStr
+    email: Email
 
 
 class PasswordResetConfirm(BaseModel):
@@ -62,7 +100,12 @@ class PasswordResetConfirm(BaseModel):
 
 class EmailVerificationRequest(BaseModel):
     """Email verification request model"""
-    email: EmailStr
+    email: Email
+
+
+class BatchDeleteRequest(BaseModel):
+    """Emails of test users to delete (development only)"""
+    emails: List[Email] = Field(..., min_length=1, max_length=100)
 
 
 class UserResponse(BaseModel):
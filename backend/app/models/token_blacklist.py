@@ -1,33 +1,113 @@
-from datetime import datetime
-from typing import Optional
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Dict, FrozenSet, Optional
+from app.config.settings import settings
+from app.config.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
 
 
 class TokenBlacklist:
     """
-    In-memory token blacklist for logout functionality.
+    Token blacklist for logout functionality.
+
+    Tokens are tracked by a short digest together with their expiry, so
+    entries drop out on their own once the token could not be used anyway.
 
-    Note: In production, use Redis or database for distributed systems.
-    This simple implementation works for single-server deployments.
+    When REDIS_URL is configured, revocations are also written to Redis
+    (SETEX with the token's remaining lifetime) so that every worker sees
+    them. Without Redis the blacklist is in-memory only, which works for
+    single-server deployments.
     """
 
-    _blacklist = set()
+    _blacklist: Dict[bytes, float] = {}  # token digest -> expiry timestamp
+    # Read-only snapshot of the digests, swapped on every write; lookups
+    # only ever touch this so they hash 16 bytes instead of the whole token
+    _revoked: FrozenSet[bytes] = frozenset()
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        """Short digest of the token used as blacklist key"""
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+    @classmethod
+    def _publish(cls):
+        """Replace the lookup snapshot after the blacklist changed"""
+        cls._revoked = frozenset(cls._blacklist)
 
     @classmethod
-    def add_token(cls, token: str, expires_at: Optional[datetime] = None):
-        """Add token to blacklist"""
-        cls._blacklist.add(token)
+    def _get_redis(cls):
+        """Get the shared Redis client, or None if Redis is not configured"""
+        return get_redis()
 
     @classmethod
-    def is_blacklisted(cls, token: str) -> bool:
+    async def add_token(cls, token: str, expires_at: Optional[datetime] = None):
+        """Add token to blacklist until it expires"""
+        now = time.time()
+        # No access token we issue lives longer than this
+        max_expires_ts = now + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+        if expires_at is None:
+            expires_ts = max_expires_ts
+        else:
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            expires_ts = min(expires_at.timestamp(), max_expires_ts)
+
+        # Writes are rare (logouts), so prune expired entries here
+        cls._blacklist = {k: v for k, v in cls._blacklist.items() if v > now}
+
+        digest = cls._digest(token)
+        cls._blacklist[digest] = expires_ts
+        cls._publish()
+
+        client = cls._get_redis()
+        if client is not None:
+            ttl = max(int(expires_ts - now), 1)
+            # Like lookups, fall back to the local blacklist if Redis is down
+            try:
+                await client.setex(f"bl:{digest.hex()}", ttl, "1")
+            except Exception as e:
+                logger.warning("Could not write token blacklist entry to Redis: %s", e)
+
+    @classmethod
+    async def is_blacklisted(cls, token: str) -> bool:
         """Check if token is blacklisted"""
-        return token in cls._blacklist
+        digest = cls._digest(token)
+
+        # Expired entries may linger until the next write, but such tokens
+        # fail JWT expiry validation anyway
+        if digest in cls._revoked:
+            return True
+
+        # Token may have been revoked on another worker
+        client = cls._get_redis()
+        if client is not None:
+            try:
+                return bool(await client.exists(f"bl:{digest.hex()}"))
+            except Exception as e:
+                logger.warning("Could not check token blacklist in Redis: %s", e)
+
+        return False
 
     @classmethod
-    def remove_token(cls, token: str):
+    async def remove_token(cls, token: str):
         """Remove token from blacklist"""
-        cls._blacklist.discard(token)
+        digest = cls._digest(token)
+        cls._blacklist.pop(digest, None)
+        cls._publish()
+
+        client = cls._get_redis()
+        if client is not None:
+            try:
+                await client.delete(f"bl:{digest.hex()}")
+            except Exception as e:
+                logger.warning("Could not remove token blacklist entry from Redis: %s", e)
 
     @classmethod
     def clear_all(cls):
-        """Clear all blacklisted tokens (for testing)"""
+        """Clear all locally blacklisted tokens (for testing)"""
         cls._blacklist.clear()
+        cls._publish()
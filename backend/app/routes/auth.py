@@ -1,5 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+import asyncio
+from firebase_admin.auth import UserNotFoundError
+from jwt import PyJWTError
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
+from app.config.settings import settings
 from app.models.auth import (
     UserRegister,
     UserLogin,
@@ -9,20 +13,29 @@ from app.models.auth import (
     PasswordResetConfirm,
     EmailVerificationRequest,
     UserResponse,
-    MessageResponse
+    MessageResponse,
+    TestUserResponse,
+    BatchDeleteRequest
 )
 from app.services.auth_service import AuthService
-from app.middleware.auth import get_current_user, get_current_active_user, verify_refresh_token
+from app.security import security
+from app.middleware.auth import (
+    get_current_user,
+    get_current_user_profile,
+    verify_refresh_token
+)
 from app.models.auth import TokenData
 from app.models.token_blacklist import TokenBlacklist
-
-security = HTTPBearer()
+from app.utils.jwt import create_token_pair, get_token_expiry
+from app.utils.jwt_cache import invalidate_cached_token, invalidate_user_tokens
+from app.utils.login_writer import flush_logins, flush_logins_if_due
+from app.utils.user_cache import invalidate_user, email_index_ref
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserRegister):
+async def register(user_data: UserRegister, background_tasks: BackgroundTasks):
     """
     Register a new user with email and password
 
@@ -32,12 +45,12 @@ async def register(user_data: UserRegister):
 
     Returns user data with UID and sends verification email
     """
-    user = await AuthService.register_user(user_data)
+    user = await AuthService.register_user(user_data, background_tasks)
     return user
 
 
 @router.post("/login", response_model=Token)
-async def login(login_data: UserLogin):
+async def login(login_data: UserLogin, background_tasks: BackgroundTasks):
     """
     Login with email and password
 
@@ -47,11 +60,12 @@ async def login(login_data: UserLogin):
     Returns JWT access token and refresh token
     """
     token = await AuthService.login_user(login_data)
+    background_tasks.add_task(flush_logins_if_due)
     return token
 
 
 @router.post("/google", response_model=Token)
-async def google_auth(auth_request: GoogleAuthRequest):
+async def google_auth(auth_request: GoogleAuthRequest, background_tasks: BackgroundTasks):
     """
     Authenticate with Google OAuth
 
@@ -61,11 +75,15 @@ async def google_auth(auth_request: GoogleAuthRequest):
     Creates new user if doesn't exist.
     """
     token = await AuthService.google_auth(auth_request.id_token)
+    background_tasks.add_task(flush_logins_if_due)
     return token
 
 
 @router.post("/refresh", response_model=Token)
-async def refresh_token(token_data: TokenData = Depends(verify_refresh_token)):
+async def refresh_token(
+    background_tasks: BackgroundTasks,
+    token_data: TokenData = Depends(verify_refresh_token)
+):
     """
     Refresh access token using refresh token
 
@@ -73,11 +91,12 @@ async def refresh_token(token_data: TokenData = Depends(verify_refresh_token)):
     Returns new access token and refresh token.
     """
     token = await AuthService.refresh_access_token(token_data.uid, token_data.email)
+    background_tasks.add_task(flush_logins)
     return token
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_current_user_info(current_user: dict = Depends(get_current_active_user)):
+async def get_current_user_info(current_user: dict = Depends(get_current_user_profile)):
     """
     Get current user information
 
@@ -95,7 +114,7 @@ async def get_current_user_info(current_user: dict = Depends(get_current_active_
 
 
 @router.post("/forgot-password", response_model=MessageResponse)
-async def forgot_password(request: PasswordResetRequest):
+async def forgot_password(request: PasswordResetRequest, background_tasks: BackgroundTasks):
     """
     Request password reset
 
@@ -104,7 +123,7 @@ async def forgot_password(request: PasswordResetRequest):
     Sends password reset email with reset link (expires in 1 hour).
     Returns success message even if email doesn't exist (security).
     """
-    await AuthService.request_password_reset(request.email)
+    await AuthService.request_password_reset(request.email, background_tasks)
     return MessageResponse(
         message="If the email exists, a password reset link has been sent.",
         success=True
@@ -129,7 +148,7 @@ async def reset_password(request: PasswordResetConfirm):
 
 
 @router.post("/verify-email", response_model=MessageResponse)
-async def request_email_verification(request: EmailVerificationRequest):
+async def request_email_verification(request: EmailVerificationRequest, background_tasks: BackgroundTasks):
     """
     Request email verification link
 
@@ -142,7 +161,7 @@ async def request_email_verification(request: EmailVerificationRequest):
 
     try:
         verification_link = firebase_client.generate_email_verification_link(request.email)
-        await send_verification_email(request.email, verification_link)
+        background_tasks.add_task(send_verification_email, request.email, verification_link)
 
         return MessageResponse(
             message="Verification email has been sent.",
@@ -156,7 +175,10 @@ async def request_email_verification(request: EmailVerificationRequest):
 
 
 @router.post("/logout", response_model=MessageResponse)
-async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
+async def logout(
+    background_tasks: BackgroundTasks,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
     """
     Logout user by invalidating the current access token
 
@@ -167,8 +189,21 @@ async def logout(credentials: HTTPAuthorizationCredentials = Depends(security)):
     """
     token = credentials.credentials
 
-    # Add token to blacklist
-    TokenBlacklist.add_token(token)
+    # Keep the token blacklisted only until it would have expired anyway.
+    # Tokens we didn't sign are rejected by the middleware already, so they
+    # are not stored (their exp claim can't be trusted).
+    try:
+        expires_at = get_token_expiry(token)
+    except PyJWTError:
+        expires_at = None
+
+    if expires_at is not None:
+        # Add token to blacklist and drop it from the verified-token cache
+        await TokenBlacklist.add_token(token, expires_at)
+        invalidate_cached_token(token)
+
+    # Write any queued login timestamps so they are not held back
+    background_tasks.add_task(flush_logins)
 
     return MessageResponse(
         message="Logged out successfully. Token has been revoked.",
@@ -191,6 +226,37 @@ async def delete_account(current_user: TokenData = Depends(get_current_user)):
     )
 
 
+async def _delete_user_by_email(email: str) -> bool:
+    """
+    Delete a user from Firebase Auth and Firestore
+
+    Returns:
+        False if no Firebase Auth user has this email
+    """
+    from app.config.firebase import firebase_client
+
+    try:
+        user = firebase_client.get_auth().get_user_by_email(email)
+    except UserNotFoundError:
+        return False
+
+    uid = user.uid
+    await invalidate_user(uid)
+    invalidate_user_tokens(uid)
+
+    # Delete from Firebase Auth and Firestore concurrently
+    loop = asyncio.get_running_loop()
+    users_ref = firebase_client.users
+    batch = firebase_client.db.batch()
+    batch.delete(users_ref.document(uid))
+    batch.delete(email_index_ref(email))
+    await asyncio.gather(
+        loop.run_in_executor(None, firebase_client.delete_user, uid),
+        loop.run_in_executor(None, batch.commit)
+    )
+    return True
+
+
 @router.delete("/admin/delete-user-by-email/{email}", response_model=MessageResponse)
 async def admin_delete_user_by_email(email: str):
     """
@@ -201,33 +267,17 @@ async def admin_delete_user_by_email(email: str):
 
     **WARNING:** Remove this endpoint in production!
     """
-    from app.config.firebase import firebase_client
-    from app.config.settings import settings
-
     try:
-        # Get user by email from Firebase Auth
-        try:
-            user = firebase_client.get_auth().get_user_by_email(email)
-            uid = user.uid
-
-            # Delete from Firebase Auth
-            firebase_client.delete_user(uid)
-
-            # Delete from Firestore
-            users_ref = firebase_client.db.collection(settings.FIRESTORE_COLLECTION_USERS)
-            users_ref.document(uid).delete()
-
+        if not await _delete_user_by_email(email):
             return MessageResponse(
-                message=f"User {email} deleted from Firebase Auth and Firestore",
-                success=True
+                message=f"User {email} not found in Firebase Auth",
+                success=False
             )
-        except Exception as e:
-            if "USER_NOT_FOUND" in str(e):
-                return MessageResponse(
-                    message=f"User {email} not found in Firebase Auth",
-                    success=False
-                )
-            raise
+
+        return MessageResponse(
+            message=f"User {email} deleted from Firebase Auth and Firestore",
+            success=True
+        )
 
     except Exception as e:
         raise HTTPException(
@@ -236,6 +286,80 @@ async def admin_delete_user_by_email(email: str):
         )
 
 
+# Test user setup and teardown (only routed when ENABLE_TEST_ADMIN_ROUTES is on)
+if settings.ENABLE_TEST_ADMIN_ROUTES:
+    @router.post("/admin/test-setup", response_model=TestUserResponse, include_in_schema=False)
+    async def admin_test_setup(user_data: UserRegister, background_tasks: BackgroundTasks):
+        """
+        **ADMIN ONLY - FOR DEVELOPMENT**
+
+        Replace any existing user with this email by a freshly registered
+        one and return tokens for it, so test scripts need one request
+        instead of delete, register and login.
+        """
+        try:
+            await _delete_user_by_email(user_data.email)
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error deleting user: {str(e)}"
+            )
+
+        user = await AuthService.register_user(user_data, background_tasks)
+        access_token, refresh_token = create_token_pair(user["uid"], user["email"])
+
+        return TestUserResponse.model_construct(
+            uid=user["uid"],
+            access_token=access_token,
+            refresh_token=refresh_token,
+            token_type="bearer",
+            expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+        )
+
+    @router.post("/admin/delete-users-batch", response_model=MessageResponse, include_in_schema=False)
+    async def admin_delete_users_batch(request: BatchDeleteRequest):
+        """
+        **ADMIN ONLY - FOR DEVELOPMENT**
+
+        Delete up to 100 users by email from Firebase Auth and Firestore
+        with one Auth lookup, one Auth delete and one Firestore batch.
+        Emails without a user are skipped.
+        """
+        from app.config.firebase import firebase_client
+
+        try:
+            loop = asyncio.get_running_loop()
+            users = await loop.run_in_executor(
+                None, firebase_client.get_users_by_email, request.emails
+            )
+
+            if users:
+                uids = [user.uid for user in users]
+                users_ref = firebase_client.users
+                batch = firebase_client.db.batch()
+                for user in users:
+                    await invalidate_user(user.uid)
+                    invalidate_user_tokens(user.uid)
+                    batch.delete(users_ref.document(user.uid))
+                    batch.delete(email_index_ref(user.email))
+
+                await asyncio.gather(
+                    loop.run_in_executor(None, firebase_client.delete_users, uids),
+                    loop.run_in_executor(None, batch.commit)
+                )
+
+            return MessageResponse(
+                message=f"Deleted {len(users)} of {len(request.emails)} users from Firebase Auth and Firestore",
+                success=True
+            )
+
+        except Exception as e:
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail=f"Error deleting users: {str(e)}"
+            )
+
+
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
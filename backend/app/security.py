@@ -0,0 +1,5 @@
+from fastapi.security import HTTPBearer
+
+# HTTP Bearer token scheme, shared by the auth middleware and the routes
+# that read the raw token (e.g. logout)
+security = HTTPBearer()
@@ -1,31 +1,81 @@
-from datetime import datetime
+import asyncio
+import functools
+import hashlib
+import logging
+import time
+from datetime import datetime, timezone
 from typing import Optional, Dict
-from fastapi import HTTPException, status
+from cachetools import TLRUCache
+from fastapi import BackgroundTasks, HTTPException, status
 from google.oauth2 import id_token
 from google.auth.transport import requests
 from app.config.firebase import firebase_client
 from app.config.settings import settings
-from app.utils.password import hash_password, verify_password
+from app.utils.password import ahash_password, averify_and_update_password
 from app.utils.jwt import (
-    create_access_token,
-    create_refresh_token,
+    create_token_pair,
     create_password_reset_token,
     verify_password_reset_token
 )
+from app.utils.jwt_cache import invalidate_user_tokens
+from app.utils.login_writer import record_login
 from app.utils.email import send_verification_email, send_password_reset_email
+from app.utils.user_cache import (
+    invalidate_user,
+    invalidate_email,
+    get_user_by_email,
+    email_index_ref
+)
 from app.models.auth import UserRegister, UserLogin, Token
 
+logger = logging.getLogger(__name__)
+
+# Shared transport for Google token verification; its requests.Session keeps
+# the connection to googleapis.com open between verifications
+_GOOGLE_REQUEST = requests.Request()
+_GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+
+# Fixed for the process lifetime
+_ACCESS_EXPIRES_IN = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+_RESET_LINK_PREFIX = f"{settings.FRONTEND_URL}/reset-password?token="
+
+# Verified Google ID token payloads, keyed by a digest of the token and
+# kept until the token's own expiry
+_google_tokens = TLRUCache(
+    maxsize=50_000,
+    ttu=lambda _key, idinfo, _now: idinfo["exp"],
+    timer=time.time
+)
+
+
+def warm_up_google_certs():
+    """Fetch Google's OAuth2 certs once so the first sign-in reuses an open connection"""
+    _GOOGLE_REQUEST(_GOOGLE_CERTS_URL, method="GET", timeout=5)
+
+
+async def _send_verification_email(email: str):
+    """Generate an email verification link and send it (run as a background task)"""
+    try:
+        # Generating the link is a blocking Firebase call, so keep it off the event loop
+        verification_link = await asyncio.to_thread(
+            firebase_client.generate_email_verification_link, email
+        )
+        await send_verification_email(email, verification_link)
+    except Exception as e:
+        logger.warning("Error sending verification email: %s", e)
+
 
 class AuthService:
     """Authentication service for handling user auth operations"""
 
     @staticmethod
-    async def register_user(user_data: UserRegister) -> Dict:
+    async def register_user(user_data: UserRegister, background_tasks: BackgroundTasks) -> Dict:
         """
         Register a new user with email and password
 
         Args:
             user_data: User registration data
+            background_tasks: Background tasks to send the verification email from
 
         Returns:
             User data dictionary
@@ -35,10 +85,10 @@ class AuthService:
         """
         try:
             # Check if user already exists in Firestore
-            users_ref = firebase_client.db.collection(settings.FIRESTORE_COLLECTION_USERS)
-            existing_user = users_ref.where("email", "==", user_data.email).limit(1).get()
+            users_ref = firebase_client.users
+            existing_user = await get_user_by_email(user_data.email)
 
-            if len(list(existing_user)) > 0:
+            if existing_user is not None:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail="Email already registered"
@@ -52,10 +102,10 @@ class AuthService:
             )
 
             # Hash password for server-side verification
-            hashed_password = hash_password(user_data.password)
+            hashed_password = await ahash_password(user_data.password)
 
             # Create user document in Firestore
-            now = datetime.utcnow()
+            now = datetime.now(timezone.utc)
             user_doc_data = {
                 "email": user_data.email,
                 "full_name": user_data.full_name,
@@ -65,18 +115,19 @@ class AuthService:
                 "auth_provider": "email",
                 "hashed_password": hashed_password,  # Store for server-side verification
                 "password_changed_at": now,  # Track when password was set/changed
+                "password_changed_at_ts": now.timestamp(),
             }
 
-            users_ref.document(firebase_user.uid).set(user_doc_data)
+            # Write the user document and its email index entry together
+            batch = firebase_client.db.batch()
+            batch.set(users_ref.document(firebase_user.uid), user_doc_data)
+            batch.set(email_index_ref(user_data.email), {"uid": firebase_user.uid})
+            batch.commit()
+            await invalidate_email(user_data.email)
 
-            # Generate email verification link
-            try:
-                verification_link = firebase_client.generate_email_verification_link(user_data.email)
-                # Send verification email
-                await send_verification_email(user_data.email, verification_link)
-            except Exception as e:
-                print(f"Error sending verification email: {str(e)}")
-                # Don't fail registration if email fails
+            # Send verification email after the response
+            # (registration doesn't fail if the email fails)
+            background_tasks.add_task(_send_verification_email, user_data.email)
 
             return {
                 "uid": firebase_user.uid,
@@ -110,19 +161,15 @@ class AuthService:
         """
         try:
             # Get user from Firestore
-            users_ref = firebase_client.db.collection(settings.FIRESTORE_COLLECTION_USERS)
-            user_query = users_ref.where("email", "==", login_data.email).limit(1).get()
+            existing_user = await get_user_by_email(login_data.email)
 
-            users_list = list(user_query)
-            if len(users_list) == 0:
+            if existing_user is None:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid email or password"
                 )
 
-            user_doc = users_list[0]
-            user_data = user_doc.to_dict()
-            uid = user_doc.id
+            uid, user_data = existing_user
 
             # Verify password (server-side verification)
             stored_password = user_data.get("hashed_password")
@@ -139,29 +186,37 @@ class AuthService:
                     detail="Invalid email or password"
                 )
 
-            # Verify the password
-            if not verify_password(login_data.password, stored_password):
+            # Verify the password. Password changes invalidate the cached hash
+            # on every worker, so a mismatch is not re-checked against Firestore
+            password_ok, new_hash = await averify_and_update_password(login_data.password, stored_password)
+
+            if not password_ok:
                 raise HTTPException(
                     status_code=status.HTTP_401_UNAUTHORIZED,
                     detail="Invalid email or password"
                 )
 
-            # Update last login timestamp
-            users_ref.document(uid).update({
-                "last_login": datetime.utcnow(),
-                "updated_at": datetime.utcnow()
+            # Upgrade hashes made with older schemes or parameters (e.g. bcrypt)
+            if new_hash:
+                users_ref = firebase_client.users
+                users_ref.document(uid).update({"hashed_password": new_hash})
+                await invalidate_email(login_data.email)
+
+            # Queue last login timestamp (written in batches by the route)
+            now = datetime.now(timezone.utc)
+            record_login(uid, {
+                "last_login": now,
+                "updated_at": now
             })
 
             # Create JWT tokens
-            token_data = {"sub": uid, "email": login_data.email}
-            access_token = create_access_token(token_data)
-            refresh_token = create_refresh_token(token_data)
+            access_token, refresh_token = create_token_pair(uid, login_data.email)
 
-            return Token(
+            return Token.model_construct(
                 access_token=access_token,
                 refresh_token=refresh_token,
                 token_type="bearer",
-                expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+                expires_in=_ACCESS_EXPIRES_IN
             )
 
         except HTTPException:
@@ -187,12 +242,16 @@ class AuthService:
             HTTPException: If authentication fails
         """
         try:
-            # Verify Google ID token
-            idinfo = id_token.verify_oauth2_token(
-                id_token_str,
-                requests.Request(),
-                settings.GOOGLE_CLIENT_ID
-            )
+            # Verify Google ID token (reusing the result for a repeated token)
+            cache_key = hashlib.blake2b(id_token_str.encode(), digest_size=16).digest()
+            idinfo = _google_tokens.get(cache_key)
+            if idinfo is None:
+                idinfo = id_token.verify_oauth2_token(
+                    id_token_str,
+                    _GOOGLE_REQUEST,
+                    settings.GOOGLE_CLIENT_ID
+                )
+                _google_tokens[cache_key] = idinfo
 
             # Extract user info
             email = idinfo.get("email")
@@ -206,21 +265,19 @@ class AuthService:
                     detail="Email not provided by Google"
                 )
 
-            # Check if user exists
-            users_ref = firebase_client.db.collection(settings.FIRESTORE_COLLECTION_USERS)
-            existing_user = users_ref.where("email", "==", email).limit(1).get()
+            now = datetime.now(timezone.utc)
 
-            existing_users_list = list(existing_user)
+            # Check if user exists
+            users_ref = firebase_client.users
+            existing_user = await get_user_by_email(email)
 
-            if len(existing_users_list) > 0:
+            if existing_user is not None:
                 # User exists, log them in
-                user_doc = existing_users_list[0]
-                uid = user_doc.id
-                user_data = user_doc.to_dict()
+                uid, user_data = existing_user
 
-                # Update last login
-                users_ref.document(uid).update({
-                    "updated_at": datetime.utcnow()
+                # Queue last login update
+                record_login(uid, {
+                    "updated_at": now
                 })
 
             else:
@@ -247,25 +304,27 @@ class AuthService:
                     "email": email,
                     "full_name": name,
                     "email_verified": True,
-                    "created_at": datetime.utcnow(),
-                    "updated_at": datetime.utcnow(),
+                    "created_at": now,
+                    "updated_at": now,
                     "auth_provider": "google",
                     "photo_url": picture,
                     "google_uid": google_uid
                 }
 
-                users_ref.document(uid).set(user_doc_data)
+                batch = firebase_client.db.batch()
+                batch.set(users_ref.document(uid), user_doc_data)
+                batch.set(email_index_ref(email), {"uid": uid})
+                batch.commit()
+                await invalidate_email(email)
 
             # Create JWT tokens
-            token_data = {"sub": uid, "email": email}
-            access_token = create_access_token(token_data)
-            refresh_token_str = create_refresh_token(token_data)
+            access_token, refresh_token_str = create_token_pair(uid, email)
 
-            return Token(
+            return Token.model_construct(
                 access_token=access_token,
                 refresh_token=refresh_token_str,
                 token_type="bearer",
-                expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+                expires_in=_ACCESS_EXPIRES_IN
             )
 
         except HTTPException:
@@ -288,37 +347,33 @@ class AuthService:
         Returns:
             New Token object
         """
-        token_data = {"sub": uid, "email": email}
-        access_token = create_access_token(token_data)
-        refresh_token_str = create_refresh_token(token_data)
+        access_token, refresh_token_str = create_token_pair(uid, email)
 
-        return Token(
+        return Token.model_construct(
             access_token=access_token,
             refresh_token=refresh_token_str,
             token_type="bearer",
-            expires_in=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+            expires_in=_ACCESS_EXPIRES_IN
         )
 
     @staticmethod
-    async def request_password_reset(email: str) -> bool:
+    async def request_password_reset(email: str, background_tasks: BackgroundTasks) -> bool:
         """
         Request password reset
 
         Args:
             email: User email
+            background_tasks: Background tasks to send the reset email from
 
         Returns:
-            True if email sent successfully
+            True if email queued successfully
 
         Raises:
             HTTPException: If user not found
         """
         try:
             # Check if user exists
-            users_ref = firebase_client.db.collection(settings.FIRESTORE_COLLECTION_USERS)
-            user_query = users_ref.where("email", "==", email).limit(1).get()
-
-            if len(list(user_query)) == 0:
+            if await get_user_by_email(email) is None:
                 # Don't reveal if user exists or not for security
                 return True
 
@@ -326,15 +381,15 @@ class AuthService:
             reset_token = create_password_reset_token(email)
 
             # Create reset link
-            reset_link = f"{settings.FRONTEND_URL}/reset-password?token={reset_token}"
+            reset_link = _RESET_LINK_PREFIX + reset_token
 
-            # Send password reset email
-            await send_password_reset_email(email, reset_link)
+            # Send password reset email after the response
+            background_tasks.add_task(send_password_reset_email, email, reset_link)
 
             return True
 
         except Exception as e:
-            print(f"Error requesting password reset: {str(e)}")
+            logger.warning("Error requesting password reset: %s", e)
             return True  # Don't reveal errors for security
 
     @staticmethod
@@ -357,19 +412,16 @@ class AuthService:
             email = verify_password_reset_token(token)
 
             # Get user
-            users_ref = firebase_client.db.collection(settings.FIRESTORE_COLLECTION_USERS)
-            user_query = users_ref.where("email", "==", email).limit(1).get()
+            users_ref = firebase_client.users
+            existing_user = await get_user_by_email(email)
 
-            users_list = list(user_query)
-            if len(users_list) == 0:
+            if existing_user is None:
                 raise HTTPException(
                     status_code=status.HTTP_404_NOT_FOUND,
                     detail="User not found"
                 )
 
-            user_doc = users_list[0]
-            uid = user_doc.id
-            user_data = user_doc.to_dict()
+            uid, user_data = existing_user
 
             # Check if user registered with email/password
             if user_data.get("auth_provider") == "google":
@@ -383,14 +435,19 @@ class AuthService:
 
             # Hash new password and update in Firestore
             # Also update password_changed_at to invalidate all existing sessions
-            now = datetime.utcnow()
-            new_hashed_password = hash_password(new_password)
+            now = datetime.now(timezone.utc)
+            new_hashed_password = await ahash_password(new_password)
             users_ref.document(uid).update({
                 "hashed_password": new_hashed_password,
                 "password_changed_at": now,  # This will invalidate all existing tokens
+                "password_changed_at_ts": now.timestamp(),
                 "updated_at": now
             })
 
+            # Drop the cached user and tokens so the new password_changed_at is enforced
+            await invalidate_user(uid)
+            invalidate_user_tokens(uid)
+
             return True
 
         except HTTPException:
@@ -416,12 +473,25 @@ class AuthService:
             HTTPException: If deletion fails
         """
         try:
-            # Delete from Firebase Auth
-            firebase_client.delete_user(uid)
-
-            # Delete from Firestore
-            users_ref = firebase_client.db.collection(settings.FIRESTORE_COLLECTION_USERS)
-            users_ref.document(uid).delete()
+            await invalidate_user(uid)
+            invalidate_user_tokens(uid)
+
+            loop = asyncio.get_running_loop()
+            users_ref = firebase_client.users
+            user_ref = users_ref.document(uid)
+
+            # Need the email to find the index entry
+            user_doc = await loop.run_in_executor(None, functools.partial(user_ref.get, field_paths=["email"]))
+            batch = firebase_client.db.batch()
+            batch.delete(user_ref)
+            if user_doc.exists and user_doc.get("email"):
+                batch.delete(email_index_ref(user_doc.get("email")))
+
+            # Delete from Firebase Auth and Firestore concurrently
+            await asyncio.gather(
+                loop.run_in_executor(None, firebase_client.delete_user, uid),
+                loop.run_in_executor(None, batch.commit)
+            )
 
             # TODO: Delete related data (food logs, meal plans, etc.)
 
@@ -1,9 +1,10 @@
-from app.utils.jwt import create_access_token, create_refresh_token, verify_token, decode_token
+from app.utils.jwt import create_access_token, create_refresh_token, create_token_pair, verify_token, decode_token
 from app.utils.password import hash_password, verify_password
 
 __all__ = [
     "create_access_token",
     "create_refresh_token",
+    "create_token_pair",
     "verify_token",
     "decode_token",
     "hash_password",
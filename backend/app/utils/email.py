@@ -1,76 +1,23 @@
+import asyncio
+import html
+import logging
+import queue
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from string import Template
 from app.config.settings import settings
 from typing import Optional
 
+logger = logging.getLogger(__name__)
 
-async def send_email(
-    to_email: str,
-    subject: str,
-    body: str,
-    html_body: Optional[str] = None
-) -> bool:
-    """
-    Send email using SMTP
-
-    Args:
-        to_email: Recipient email address
-        subject: Email subject
-        body: Plain text email body
-        html_body: Optional HTML email body
-
-    Returns:
-        True if email sent successfully, False otherwise
-    """
-    try:
-        # Create message
-        message = MIMEMultipart("alternative")
-        message["From"] = f"{settings.EMAIL_FROM_NAME} <{settings.EMAIL_FROM}>"
-        message["To"] = to_email
-        message["Subject"] = subject
-
-        # Add plain text part
-        text_part = MIMEText(body, "plain")
-        message.attach(text_part)
-
-        # Add HTML part if provided
-        if html_body:
-            html_part = MIMEText(html_body, "html")
-            message.attach(html_part)
-
-        # Connect to SMTP server and send email
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.send_message(message)
-
-        return True
-
-    except Exception as e:
-        print(f"Error sending email: {str(e)}")
-        return False
-
-
-async def send_verification_email(email: str, verification_link: str) -> bool:
-    """
-    Send email verification email
-
-    Args:
-        email: User email address
-        verification_link: Email verification link
-
-    Returns:
-        True if email sent successfully
-    """
-    subject = "Verify your SehatGuru account"
-
-    body = f"""
+# Email templates, compiled once at import; only the link changes per send
+_VERIFICATION_TEXT = Template("""
     Welcome to SehatGuru!
 
     Please verify your email address by clicking the link below:
 
-    {verification_link}
+    $link
 
     This link will expire in 24 hours.
 
@@ -78,22 +25,22 @@ async def send_verification_email(email: str, verification_link: str) -> bool:
 
     Best regards,
     The SehatGuru Team
-    """
+    """)
 
-    html_body = f"""
+_VERIFICATION_HTML = Template("""
     <html>
         <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
             <h2 style="color: #4CAF50;">Welcome to SehatGuru!</h2>
             <p>Please verify your email address by clicking the button below:</p>
             <div style="margin: 30px 0;">
-                <a href="{verification_link}"
+                <a href="$link"
                    style="background-color: #4CAF50; color: white; padding: 12px 24px;
                           text-decoration: none; border-radius: 4px; display: inline-block;">
                     Verify Email Address
                 </a>
             </div>
             <p>Or copy and paste this link in your browser:</p>
-            <p style="color: #666; word-break: break-all;">{verification_link}</p>
+            <p style="color: #666; word-break: break-all;">$link</p>
             <p style="color: #999; font-size: 12px; margin-top: 30px;">
                 This link will expire in 24 hours.
             </p>
@@ -107,32 +54,16 @@ async def send_verification_email(email: str, verification_link: str) -> bool:
             </p>
         </body>
     </html>
-    """
-
-    return await send_email(email, subject, body, html_body)
-
-
-async def send_password_reset_email(email: str, reset_link: str) -> bool:
-    """
-    Send password reset email
-
-    Args:
-        email: User email address
-        reset_link: Password reset link
+    """)
 
-    Returns:
-        True if email sent successfully
-    """
-    subject = "Reset your SehatGuru password"
-
-    body = f"""
+_PASSWORD_RESET_TEXT = Template("""
     Hello,
 
     We received a request to reset your password for your SehatGuru account.
 
     Click the link below to reset your password:
 
-    {reset_link}
+    $link
 
     This link will expire in 1 hour.
 
@@ -140,23 +71,23 @@ async def send_password_reset_email(email: str, reset_link: str) -> bool:
 
     Best regards,
     The SehatGuru Team
-    """
+    """)
 
-    html_body = f"""
+_PASSWORD_RESET_HTML = Template("""
     <html>
         <body style="font-family: Arial, sans-serif; line-height: 1.6; color: #333;">
             <h2 style="color: #4CAF50;">Password Reset Request</h2>
             <p>We received a request to reset your password for your SehatGuru account.</p>
             <p>Click the button below to reset your password:</p>
             <div style="margin: 30px 0;">
-                <a href="{reset_link}"
+                <a href="$link"
                    style="background-color: #4CAF50; color: white; padding: 12px 24px;
                           text-decoration: none; border-radius: 4px; display: inline-block;">
                     Reset Password
                 </a>
             </div>
             <p>Or copy and paste this link in your browser:</p>
-            <p style="color: #666; word-break: break-all;">{reset_link}</p>
+            <p style="color: #666; word-break: break-all;">$link</p>
             <p style="color: #999; font-size: 12px; margin-top: 30px;">
                 This link will expire in 1 hour.
             </p>
@@ -170,6 +101,152 @@ async def send_password_reset_email(email: str, reset_link: str) -> bool:
             </p>
         </body>
     </html>
+    """)
+
+# Authenticated SMTP connections kept open between sends, so the TLS
+# handshake and login only happen when a connection is first opened
+SMTP_POOL_SIZE = 4
+_smtp_pool: "queue.LifoQueue[smtplib.SMTP]" = queue.LifoQueue(maxsize=SMTP_POOL_SIZE)
+
+
+def _connect() -> smtplib.SMTP:
+    """Open and authenticate a new SMTP connection"""
+    server = smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT)
+    server.starttls()
+    server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
+    return server
+
+
+def _borrow() -> smtplib.SMTP:
+    """Get a live connection from the pool, or open a new one"""
+    while True:
+        try:
+            server = _smtp_pool.get_nowait()
+        except queue.Empty:
+            return _connect()
+
+        # The server may have closed an idle connection, which can surface
+        # as a socket error (e.g. ConnectionResetError) rather than an SMTP one
+        try:
+            if server.noop()[0] == 250:
+                return server
+        except (smtplib.SMTPException, OSError):
+            pass
+        _close(server)
+
+
+def _release(server: smtplib.SMTP):
+    """Return a connection to the pool, closing it if the pool is full"""
+    try:
+        _smtp_pool.put_nowait(server)
+    except queue.Full:
+        _close(server)
+
+
+def _close(server: smtplib.SMTP):
+    """Close a connection, dropping it if QUIT fails"""
+    try:
+        server.quit()
+    except Exception:
+        server.close()
+
+
+def close_smtp_pool():
+    """Close all pooled SMTP connections"""
+    while True:
+        try:
+            _close(_smtp_pool.get_nowait())
+        except queue.Empty:
+            return
+
+
+def _send_message(message: MIMEMultipart):
+    """Send a message over a pooled connection (blocking)"""
+    server = _borrow()
+    try:
+        server.send_message(message)
+    except Exception:
+        # Don't put a connection in an unknown state back in the pool
+        _close(server)
+        raise
+    _release(server)
+
+
+async def send_email(
+    to_email: str,
+    subject: str,
+    body: str,
+    html_body: Optional[str] = None
+) -> bool:
+    """
+    Send email using SMTP
+
+    Args:
+        to_email: Recipient email address
+        subject: Email subject
+        body: Plain text email body
+        html_body: Optional HTML email body
+
+    Returns:
+        True if email sent successfully, False otherwise
+    """
+    try:
+        # Create message
+        message = MIMEMultipart("alternative")
+        message["From"] = f"{settings.EMAIL_FROM_NAME} <{settings.EMAIL_FROM}>"
+        message["To"] = to_email
+        message["Subject"] = subject
+
+        # Add plain text part
+        text_part = MIMEText(body, "plain")
+        message.attach(text_part)
+
+        # Add HTML part if provided
+        if html_body:
+            html_part = MIMEText(html_body, "html")
+            message.attach(html_part)
+
+        # smtplib is blocking, so send from a worker thread
+        await asyncio.to_thread(_send_message, message)
+
+        return True
+
+    except Exception as e:
+        logger.error("Error sending email: %s", e)
+        return False
+
+
+async def send_verification_email(email: str, verification_link: str) -> bool:
+    """
+    Send email verification email
+
+    Args:
+        email: User email address
+        verification_link: Email verification link
+
+    Returns:
+        True if email sent successfully
+    """
+    subject = "Verify your SehatGuru account"
+    body = _VERIFICATION_TEXT.substitute(link=verification_link)
+    html_body = _VERIFICATION_HTML.substitute(link=html.escape(verification_link, quote=True))
+
+    return await send_email(email, subject, body, html_body)
+
+
+async def send_password_reset_email(email: str, reset_link: str) -> bool:
     """
+    Send password reset email
+
+    Args:
+        email: User email address
+        reset_link: Password reset link
+
+    Returns:
+        True if email sent successfully
+    """
+    subject = "Reset your SehatGuru password"
+    body = _PASSWORD_RESET_TEXT.substitute(link=reset_link)
+    html_body = _PASSWORD_RESET_HTML.substitute(link=html.escape(reset_link, quote=True))
 
     return await send_email(email, subject, body, html_body)
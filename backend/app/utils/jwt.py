@@ -1,9 +1,18 @@
-from datetime import datetime, timedelta
-from typing import Optional, Dict
-from jose import JWTError, jwt
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Tuple
+import jwt
+from jwt import PyJWTError
 from app.config.settings import settings
 from app.models.auth import TokenData
 
+# Signing key and algorithm list are fixed for the process lifetime, so
+# build them once instead of on every encode/decode
+_SECRET_KEY = settings.JWT_SECRET_KEY.encode()
+_ALGORITHM = settings.JWT_ALGORITHM
+_ALGORITHMS = [_ALGORITHM]
+_ACCESS_EXPIRE_DELTA = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+_REFRESH_EXPIRE_DELTA = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
@@ -17,22 +26,23 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         Encoded JWT token string
     """
     to_encode = data.copy()
+    now = datetime.now(timezone.utc)
 
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        expire = now + _ACCESS_EXPIRE_DELTA
 
     to_encode.update({
         "exp": expire,
-        "iat": datetime.utcnow(),
+        "iat": now.timestamp(),
         "token_type": "access"
     })
 
     encoded_jwt = jwt.encode(
         to_encode,
-        settings.JWT_SECRET_KEY,
-        algorithm=settings.JWT_ALGORITHM
+        _SECRET_KEY,
+        algorithm=_ALGORITHM
     )
 
     return encoded_jwt
@@ -50,27 +60,60 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
         Encoded JWT refresh token string
     """
     to_encode = data.copy()
+    now = datetime.now(timezone.utc)
 
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+        expire = now + _REFRESH_EXPIRE_DELTA
 
     to_encode.update({
         "exp": expire,
-        "iat": datetime.utcnow(),
+        "iat": now.timestamp(),
         "token_type": "refresh"
     })
 
     encoded_jwt = jwt.encode(
         to_encode,
-        settings.JWT_SECRET_KEY,
-        algorithm=settings.JWT_ALGORITHM
+        _SECRET_KEY,
+        algorithm=_ALGORITHM
     )
 
     return encoded_jwt
 
 
+def create_token_pair(uid: str, email: str) -> Tuple[str, str]:
+    """
+    Create an access token and a refresh token for a user
+
+    Both tokens share one timestamp and base payload. iat keeps its
+    sub-second part so a token issued just after a password change is not
+    mistaken for an older one (see get_current_active_user).
+
+    Args:
+        uid: User ID
+        email: User email
+
+    Returns:
+        Tuple of (access token, refresh token)
+    """
+    now = datetime.now(timezone.utc)
+    base = {"sub": uid, "email": email, "iat": now.timestamp()}
+
+    access_token = jwt.encode(
+        {**base, "exp": now + _ACCESS_EXPIRE_DELTA, "token_type": "access"},
+        _SECRET_KEY,
+        algorithm=_ALGORITHM
+    )
+    refresh_token = jwt.encode(
+        {**base, "exp": now + _REFRESH_EXPIRE_DELTA, "token_type": "refresh"},
+        _SECRET_KEY,
+        algorithm=_ALGORITHM
+    )
+
+    return access_token, refresh_token
+
+
 def verify_token(token: str, token_type: str = "access") -> TokenData:
     """
     Verify and decode JWT token
@@ -83,30 +126,38 @@ def verify_token(token: str, token_type: str = "access") -> TokenData:
         TokenData object
 
     Raises:
-        JWTError: If token is invalid
+        PyJWTError: If token is invalid
     """
     try:
         payload = jwt.decode(
             token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
+            _SECRET_KEY,
+            algorithms=_ALGORITHMS
         )
 
         uid: str = payload.get("sub")
         email: str = payload.get("email")
         payload_token_type: str = payload.get("token_type")
-        iat: int = payload.get("iat")  # Issued at timestamp
+        iat: float = payload.get("iat")  # Issued at timestamp
+        exp: int = payload.get("exp")  # Expiration timestamp
 
         if uid is None:
-            raise JWTError("Token missing subject (uid)")
+            raise PyJWTError("Token missing subject (uid)")
 
         if payload_token_type != token_type:
-            raise JWTError(f"Invalid token type. Expected {token_type}, got {payload_token_type}")
-
-        return TokenData(uid=uid, email=email, token_type=payload_token_type, iat=iat)
+            raise PyJWTError(f"Invalid token type. Expected {token_type}, got {payload_token_type}")
+
+        # Claims come from a token we signed, so skip re-validating them
+        return TokenData.model_construct(
+            uid=uid,
+            email=email,
+            token_type=payload_token_type,
+            iat=iat,
+            exp=exp
+        )
 
-    except JWTError as e:
-        raise JWTError(f"Could not validate token: {str(e)}")
+    except PyJWTError as e:
+        raise PyJWTError(f"Could not validate token: {str(e)}")
 
 
 def decode_token(token: str) -> Dict:
@@ -122,13 +173,36 @@ def decode_token(token: str) -> Dict:
     try:
         payload = jwt.decode(
             token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM],
             options={"verify_signature": False}
         )
         return payload
-    except JWTError as e:
-        raise JWTError(f"Could not decode token: {str(e)}")
+    except PyJWTError as e:
+        raise PyJWTError(f"Could not decode token: {str(e)}")
+
+
+def get_token_expiry(token: str) -> datetime:
+    """
+    Get the expiry of a token we signed, even if it has already expired
+
+    Args:
+        token: JWT token string
+
+    Returns:
+        Expiration time (UTC)
+
+    Raises:
+        PyJWTError: If the signature is invalid or the token has no expiry
+    """
+    try:
+        payload = jwt.decode(
+            token,
+            _SECRET_KEY,
+            algorithms=_ALGORITHMS,
+            options={"verify_exp": False, "require": ["exp"]}
+        )
+        return datetime.fromtimestamp(payload["exp"], tz=timezone.utc)
+    except PyJWTError as e:
+        raise PyJWTError(f"Could not validate token: {str(e)}")
 
 
 def create_password_reset_token(email: str) -> str:
@@ -141,19 +215,20 @@ def create_password_reset_token(email: str) -> str:
     Returns:
         Encoded JWT token for password reset
     """
-    expire = datetime.utcnow() + timedelta(hours=1)  # Reset token expires in 1 hour
+    now = datetime.now(timezone.utc)
+    expire = now + timedelta(hours=1)  # Reset token expires in 1 hour
 
     to_encode = {
         "sub": email,
         "exp": expire,
-        "iat": datetime.utcnow(),
+        "iat": now,
         "token_type": "password_reset"
     }
 
     encoded_jwt = jwt.encode(
         to_encode,
-        settings.JWT_SECRET_KEY,
-        algorithm=settings.JWT_ALGORITHM
+        _SECRET_KEY,
+        algorithm=_ALGORITHM
     )
 
     return encoded_jwt
@@ -170,25 +245,25 @@ def verify_password_reset_token(token: str) -> str:
         Email address from token
 
     Raises:
-        JWTError: If token is invalid or expired
+        PyJWTError: If token is invalid or expired
     """
     try:
         payload = jwt.decode(
             token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM]
+            _SECRET_KEY,
+            algorithms=_ALGORITHMS
         )
 
         email: str = payload.get("sub")
         token_type: str = payload.get("token_type")
 
         if email is None:
-            raise JWTError("Token missing email")
+            raise PyJWTError("Token missing email")
 
         if token_type != "password_reset":
-            raise JWTError("Invalid token type for password reset")
+            raise PyJWTError("Invalid token type for password reset")
 
         return email
 
-    except JWTError as e:
-        raise JWTError(f"Invalid or expired reset token: {str(e)}")
+    except PyJWTError as e:
+        raise PyJWTError(f"Invalid or expired reset token: {str(e)}")
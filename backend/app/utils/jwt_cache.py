@@ -0,0 +1,66 @@
+import hashlib
+import time
+from typing import Optional
+from cachetools import TTLCache
+from app.models.auth import TokenData
+
+# Verified access tokens, keyed by a digest of the raw token so that
+# repeat requests with the same token skip signature verification.
+# Entries are also checked against the token's own expiry on lookup.
+_verified_tokens = TTLCache(maxsize=10_000, ttl=60)
+
+
+def _token_cache_key(token: str) -> bytes:
+    """Digest used as cache key so raw tokens are never stored"""
+    return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+def get_verified_token(token: str) -> Optional[TokenData]:
+    """
+    Get the cached verification result for a token
+
+    Args:
+        token: Raw JWT token
+
+    Returns:
+        TokenData if the token was verified recently and has not expired
+    """
+    cache_key = _token_cache_key(token)
+    token_data = _verified_tokens.get(cache_key)
+    if token_data is None:
+        return None
+
+    if token_data.exp and token_data.exp > time.time():
+        return token_data
+
+    _verified_tokens.pop(cache_key, None)
+    return None
+
+
+def cache_verified_token(token: str, token_data: TokenData):
+    """
+    Cache the verification result for a token
+
+    Args:
+        token: Raw JWT token
+        token_data: Verified token payload
+    """
+    _verified_tokens[_token_cache_key(token)] = token_data
+
+
+def invalidate_cached_token(token: str):
+    """Remove a token from the verified-token cache (e.g. on logout)"""
+    _verified_tokens.pop(_token_cache_key(token), None)
+
+
+def invalidate_user_tokens(uid: str):
+    """
+    Remove all cached tokens for a user (e.g. after a password reset)
+
+    Args:
+        uid: User ID
+    """
+    # Resets are rare and the cache is small, so a scan is fine
+    for cache_key, token_data in list(_verified_tokens.items()):
+        if token_data.uid == uid:
+            _verified_tokens.pop(cache_key, None)
@@ -0,0 +1,87 @@
+import logging
+import threading
+import time
+from typing import Dict
+from cachetools import TTLCache
+from app.config.firebase import firebase_client
+
+logger = logging.getLogger(__name__)
+
+# Flush once this many seconds have passed or this many users are pending
+FLUSH_INTERVAL = 10
+FLUSH_SIZE = 100
+
+# Firestore allows at most 500 writes per batch
+_BATCH_LIMIT = 500
+
+# Pending user document updates keyed by UID; later logins overwrite earlier ones
+_pending: Dict[str, Dict] = {}
+_last_flush = time.monotonic()
+_lock = threading.Lock()
+
+# UIDs whose login was recorded in the last 5 minutes; further logins are skipped
+_recent_logins = TTLCache(maxsize=100_000, ttl=300)
+
+
+def record_login(uid: str, fields: Dict):
+    """
+    Queue a login timestamp update for a user document
+
+    At most one update per user is queued every 5 minutes.
+
+    Args:
+        uid: User ID
+        fields: Fields to update on the user document
+    """
+    with _lock:
+        if uid in _recent_logins:
+            return
+        _recent_logins[uid] = True
+        _pending.setdefault(uid, {}).update(fields)
+
+
+def flush_logins():
+    """Write all queued login updates to Firestore in batches"""
+    global _pending, _last_flush
+
+    with _lock:
+        pending, _pending = _pending, {}
+        _last_flush = time.monotonic()
+
+    if not pending:
+        return
+
+    users_ref = firebase_client.users
+    items = list(pending.items())
+
+    for start in range(0, len(items), _BATCH_LIMIT):
+        chunk = items[start:start + _BATCH_LIMIT]
+        batch = firebase_client.db.batch()
+        for uid, fields in chunk:
+            batch.update(users_ref.document(uid), fields)
+        try:
+            batch.commit()
+        except Exception as e:
+            # One missing document (user deleted since logging in) fails the
+            # whole batch, so write the updates one by one instead
+            logger.info("Batch of %d login updates failed, writing them one by one: %s", len(chunk), e)
+            _write_each(users_ref, chunk)
+
+
+def _write_each(users_ref, updates):
+    """Write login updates individually, skipping those that fail"""
+    dropped = 0
+    for uid, fields in updates:
+        try:
+            users_ref.document(uid).update(fields)
+        except Exception:
+            # Login timestamps are informational, so drop them rather than retry
+            dropped += 1
+    if dropped:
+        logger.warning("Dropped %d login updates that could not be written", dropped)
+
+
+def flush_logins_if_due():
+    """Flush queued login updates if enough have accumulated or time has passed"""
+    if len(_pending) >= FLUSH_SIZE or time.monotonic() - _last_flush >= FLUSH_INTERVAL:
+        flush_logins()
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import logging
+import weakref
+from typing import Optional, Dict, Tuple
+from cachetools import TTLCache
+from app.config.firebase import firebase_client
+from app.config.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Every worker keeps its own caches, so invalidations are published on this
+# Redis channel (when Redis is configured) for the other workers to apply
+INVALIDATION_CHANNEL = "user_cache:invalidate"
+
+# Firestore user documents keyed by UID
+_user_docs = TTLCache(maxsize=10_000, ttl=30)
+
+# UIDs whose email_verified status was synced from Firebase Auth recently
+_email_synced = TTLCache(maxsize=10_000, ttl=600)
+
+# (uid, user data) keyed by lowercased email, for the login/register/reset
+# lookups; the email index resolves every casing of an email to one user
+_users_by_email = TTLCache(maxsize=10_000, ttl=30)
+
+# The only user document fields read by the email lookups (login and
+# password reset); everything else is left out of the response
+_LOOKUP_FIELDS = ["hashed_password", "auth_provider"]
+
+# One lock per email being fetched, so concurrent misses share a single query
+_email_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def get_cached_user(uid: str) -> Optional[Dict]:
+    """
+    Get cached user document
+
+    Args:
+        uid: User ID
+
+    Returns:
+        User data dictionary, or None if not cached
+    """
+    return _user_docs.get(uid)
+
+
+def cache_user(uid: str, user_data: Dict):
+    """
+    Cache user document
+
+    Args:
+        uid: User ID
+        user_data: User data dictionary from Firestore
+    """
+    _user_docs[uid] = user_data
+
+
+async def invalidate_user(uid: str):
+    """
+    Remove user from the caches of every worker (call after any write to
+    the user document)
+
+    Args:
+        uid: User ID
+    """
+    _drop_user(uid)
+    await _broadcast(f"uid:{uid}")
+
+
+async def invalidate_email(email: str):
+    """
+    Remove the email lookup entry for a user from the caches of every worker
+
+    Args:
+        email: User email
+    """
+    key = email.lower()
+    _drop_email(key)
+    await _broadcast(f"email:{key}")
+
+
+def _drop_user(uid: str):
+    """Remove user from this worker's caches"""
+    _user_docs.pop(uid, None)
+    _email_synced.pop(uid, None)
+
+    # Writes by UID are rare (password reset, deletion), so a scan is fine
+    for key, (cached_uid, _) in list(_users_by_email.items()):
+        if cached_uid == uid:
+            _users_by_email.pop(key, None)
+
+
+def _drop_email(key: str):
+    """Remove a lowercased email from this worker's lookup cache"""
+    _users_by_email.pop(key, None)
+
+
+async def _broadcast(message: str):
+    """Tell the other workers to drop an entry (no-op without Redis)"""
+    client = get_redis()
+    if client is None:
+        return
+    try:
+        await client.publish(INVALIDATION_CHANNEL, message)
+    except Exception as e:
+        logger.warning("Could not publish user cache invalidation: %s", e)
+
+
+async def listen_for_invalidations():
+    """
+    Apply invalidations published by other workers (runs for the app lifetime)
+
+    Without Redis there is nothing to listen to, which is fine for a
+    single worker. If the subscription drops, the local caches are cleared
+    before resubscribing since invalidations may have been missed.
+    """
+    client = get_redis()
+    if client is None:
+        return
+
+    while True:
+        try:
+            async with client.pubsub() as pubsub:
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    kind, _, key = message["data"].decode().partition(":")
+                    if kind == "uid":
+                        _drop_user(key)
+                    elif kind == "email":
+                        _drop_email(key)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("User cache invalidation listener failed, resubscribing: %s", e)
+            _user_docs.clear()
+            _email_synced.clear()
+            _users_by_email.clear()
+            await asyncio.sleep(1)
+
+
+def email_index_ref(email: str):
+    """
+    Get the email index document for an email
+
+    The index maps sha1(lowercased email) to the user's UID, so an email can
+    be resolved with a direct document get instead of a query. Firebase Auth
+    treats emails case-insensitively, so the key is lowercased as well.
+
+    Args:
+        email: User email
+
+    Returns:
+        Firestore document reference
+    """
+    key = hashlib.sha1(email.lower().encode()).hexdigest()
+    return firebase_client.email_index.document(key)
+
+
+def _fetch_user_by_email(email: str) -> Optional[Tuple[str, Dict]]:
+    """Resolve an email to (uid, user data) via the email index"""
+    users_ref = firebase_client.users
+    index_ref = email_index_ref(email)
+
+    index_doc = index_ref.get()
+    if index_doc.exists:
+        user_doc = users_ref.document(index_doc.get("uid")).get(field_paths=_LOOKUP_FIELDS)
+        if user_doc.exists:
+            return user_doc.id, user_doc.to_dict()
+
+    # Not indexed yet (account created before the index existed), so fall
+    # back to the query and backfill the index for next time
+    query = users_ref.where("email", "==", email).select(_LOOKUP_FIELDS).limit(1)
+    user_doc = next(iter(query.stream()), None)
+    if user_doc is None:
+        return None
+
+    index_ref.set({"uid": user_doc.id})
+    return user_doc.id, user_doc.to_dict()
+
+
+async def get_user_by_email(email: str) -> Optional[Tuple[str, Dict]]:
+    """
+    Look up a user document by email, using the cache when possible
+
+    Only the hashed_password and auth_provider fields are fetched.
+
+    Args:
+        email: User email
+
+    Returns:
+        Tuple of (uid, user data), or None if no user has this email
+    """
+    key = email.lower()
+    cached = _users_by_email.get(key)
+    if cached is not None:
+        return cached
+
+    lock = _email_locks.get(key)
+    if lock is None:
+        lock = _email_locks[key] = asyncio.Lock()
+
+    async with lock:
+        # Another request may have fetched it while we waited
+        cached = _users_by_email.get(key)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, _fetch_user_by_email, email)
+
+        # Misses are not cached so a fresh registration is seen immediately
+        if result is not None:
+            _users_by_email[key] = result
+        return result
+
+
+def email_recently_synced(uid: str) -> bool:
+    """Check if email_verified was synced for this user in the last 10 minutes"""
+    return uid in _email_synced
+
+
+def mark_email_synced(uid: str):
+    """Record that email_verified was just synced for this user"""
+    _email_synced[uid] = True
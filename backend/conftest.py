@@ -0,0 +1,39 @@
+"""
+Shared pytest fixtures for the API test scripts
+
+The test_*.py scripts talk to a running server (python main.py). Under
+pytest they share one HTTP session, and each test user is registered and
+logged in once per test session instead of once per script.
+"""
+
+import pytest
+from helpers import make_session, delete_test_users, register_and_login
+
+
+@pytest.fixture(scope="session")
+def http_session():
+    """One keep-alive HTTP session for the whole test run"""
+    session = make_session()
+    yield session
+    session.close()
+
+
+@pytest.fixture(scope="session")
+def registered_user(http_session):
+    """
+    Factory that registers and logs in a test user once per test session
+
+    Calling it again with the same email returns the cached user. All users
+    created through the factory are deleted when the session ends.
+    """
+    users = {}
+
+    def _registered_user(full_name: str, email: str, password: str) -> dict:
+        if email not in users:
+            users[email] = register_and_login(http_session, full_name, email, password)
+        return users[email]
+
+    yield _registered_user
+
+    if users:
+        delete_test_users(http_session, list(users))
@@ -0,0 +1,194 @@
+"""
+Helpers shared by the API test scripts
+
+Response bodies are logged at DEBUG level, so they are only printed when
+TEST_LOG=DEBUG is set. Failures are always logged.
+"""
+
+import argparse
+import logging
+import os
+import sys
+from functools import lru_cache
+from typing import Optional
+import jwt
+import orjson
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = "http://localhost:8000/api/auth"
+
+LOG = logging.getLogger("tests")
+LOG.setLevel(os.environ.get("TEST_LOG", "WARNING").upper())
+
+if not LOG.handlers:
+    _handler = logging.StreamHandler(sys.stdout)
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    LOG.addHandler(_handler)
+    LOG.propagate = False
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+# (connect, read) timeout in seconds, so a stuck server fails a run instead of hanging it
+TIMEOUT = (3.05, 10)
+
+# Retry transient gateway errors on idempotent requests. Read and status
+# retries are limited to idempotent methods, but connect errors would be
+# retried for POST too, so connect retries are off: a retried register or
+# test-setup must never run twice.
+RETRY = Retry(total=2, connect=0, backoff_factor=0.2, status_forcelist=(502, 503, 504))
+
+
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies TIMEOUT to requests that don't set their own"""
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = TIMEOUT
+        return super().send(request, **kwargs)
+
+
+def make_session() -> requests.Session:
+    """Session with keep-alive pooling, default timeouts and retries"""
+    session = requests.Session()
+    session.mount("http://", TimeoutHTTPAdapter(pool_connections=4, pool_maxsize=32, max_retries=RETRY))
+    return session
+
+
+def post_json(session, url: str, payload, headers=None):
+    """POST a JSON body encoded with orjson instead of requests' stdlib json"""
+    if headers:
+        headers = {**JSON_HEADERS, **headers}
+    else:
+        headers = JSON_HEADERS
+    return session.post(url, data=orjson.dumps(payload), headers=headers)
+
+
+def delete_test_user(session: requests.Session, email: str):
+    """Delete a test user through the admin endpoint (ignores missing users)"""
+    session.delete(f"{API_URL}/admin/delete-user-by-email/{email}")
+
+
+def delete_test_users(session: requests.Session, emails: list):
+    """Delete several test users with one admin request (ignores missing users)"""
+    post_json(session, f"{API_URL}/admin/delete-users-batch", {"emails": emails})
+
+
+def register_and_login(session: requests.Session, full_name: str, email: str, password: str) -> dict:
+    """
+    Register a fresh test user and log them in
+
+    Any existing user with the same email is replaced. Uses the
+    /admin/test-setup endpoint, which is only routed when DEBUG is on.
+
+    Returns:
+        Dict with uid, email, password, access_token and refresh_token
+    """
+    response = post_json(
+        session,
+        f"{API_URL}/admin/test-setup",
+        {"full_name": full_name, "email": email, "password": password}
+    )
+    assert response.status_code == 200, response.text
+
+    tokens = orjson.loads(response.content)
+    return {
+        "uid": tokens["uid"],
+        "email": email,
+        "password": password,
+        "access_token": tokens["access_token"],
+        "refresh_token": tokens["refresh_token"],
+    }
+
+
+def login_existing(session: requests.Session, email: str, password: str) -> Optional[dict]:
+    """
+    Log in as a test user left over from an earlier run
+
+    Returns:
+        Same dict as register_and_login, or None if the login fails
+    """
+    response = post_json(
+        session,
+        f"{API_URL}/login",
+        {"email": email, "password": password}
+    )
+    if response.status_code != 200:
+        return None
+
+    tokens = orjson.loads(response.content)
+    claims = jwt.decode(tokens["access_token"], options={"verify_signature": False})
+    return {
+        "uid": claims["sub"],
+        "email": email,
+        "password": password,
+        "access_token": tokens["access_token"],
+        "refresh_token": tokens["refresh_token"],
+    }
+
+
+def get_test_user(session: requests.Session, full_name: str, email: str, password: str,
+                  keep_user: bool = False) -> dict:
+    """
+    Get a logged-in test user
+
+    With keep_user, an existing user whose password still works is reused
+    instead of being deleted and registered again.
+    """
+    if keep_user:
+        user = login_existing(session, email, password)
+        if user is not None:
+            return user
+    return register_and_login(session, full_name, email, password)
+
+
+def parse_test_args(description: str) -> argparse.Namespace:
+    """Command line options shared by the scripts that create a test user"""
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument(
+        "--keep-user",
+        action="store_true",
+        help="reuse the test user from a previous run if its password still works, and keep it afterwards"
+    )
+    return parser.parse_args()
+
+
+def print_section(title: str):
+    """Print a banner line for a script section"""
+    print("\n" + "=" * 60)
+    print(title)
+    print("=" * 60)
+
+
+def _format_body(response) -> str:
+    """Response body as indented JSON, or as plain text if it isn't JSON"""
+    try:
+        return orjson.dumps(orjson.loads(response.content), option=orjson.OPT_INDENT_2).decode()
+    except orjson.JSONDecodeError:
+        return response.text
+
+
+def print_response(response):
+    """Log a response body and status code (only when TEST_LOG=DEBUG)"""
+    if LOG.isEnabledFor(logging.DEBUG):
+        LOG.debug("%s\nStatus: %d", _format_body(response), response.status_code)
+
+
+def log_failure(response):
+    """Log the body and status code of an unexpected response"""
+    LOG.error("%s\nStatus: %d", _format_body(response), response.status_code)
+
+
+@lru_cache(maxsize=64)
+def reset_token(email: str) -> str:
+    """
+    Password reset token for an email, signed once per process
+
+    Reset tokens stay valid for an hour, so a cached token is still good
+    for the rest of a test run. Call reset_token.cache_clear() if a test
+    ever needs a freshly issued token.
+    """
+    # Imported here so scripts that never need a token don't load app settings
+    from app.utils.jwt import create_password_reset_token
+    return create_password_reset_token(email)
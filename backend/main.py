@@ -1,15 +1,28 @@
-from fastapi import FastAPI, Request, status
+from fastapi import FastAPI, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
+from fastapi.responses import ORJSONResponse, HTMLResponse
 from fastapi.exceptions import RequestValidationError
 from contextlib import asynccontextmanager
 from fastapi.staticfiles import StaticFiles
+import asyncio
 import uvicorn
+import logging
 import os
+import orjson
 
 from app.config.settings import settings
 from app.config.firebase import firebase_client
 from app.routes import auth
+from app.services.auth_service import warm_up_google_certs
+from app.utils.login_writer import flush_logins
+from app.utils.email import close_smtp_pool
+from app.utils.user_cache import listen_for_invalidations
+
+# Application logging: keep INFO output out of production request paths
+logging.basicConfig(
+    level=logging.WARNING if settings.ENVIRONMENT == "production" else logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
 
 
 @asynccontextmanager
@@ -23,15 +36,27 @@ async def lifespan(app: FastAPI):
 
     # Initialize Firebase
     try:
-        _ = firebase_client.db  # Initialize Firestore connection
+        firebase_client.warm_up()  # Initialize Firestore connection
         print("Firebase initialized successfully")
     except Exception as e:
         print(f"Warning: Firebase initialization issue: {str(e)}")
 
+    # Open the connection used for Google token verification
+    try:
+        warm_up_google_certs()
+    except Exception as e:
+        print(f"Warning: Could not fetch Google certs: {str(e)}")
+
+    # Apply user cache invalidations from other workers (needs REDIS_URL)
+    invalidation_listener = asyncio.create_task(listen_for_invalidations())
+
     yield
 
     # Shutdown
     print("Shutting down SehatGuru API...")
+    invalidation_listener.cancel()
+    flush_logins()  # Write any queued login timestamps
+    close_smtp_pool()
 
 
 # Create FastAPI app
@@ -41,7 +66,8 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse  # orjson serializes responses much faster than json
 )
 
 # Configure CORS
@@ -58,7 +84,7 @@ else:
     # Specific origins in production
     app.add_middleware(
         CORSMiddleware,
-        allow_origins=settings.allowed_origins_list,
+        allow_origins=list(settings.allowed_origins_list),
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
@@ -69,7 +95,7 @@ else:
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     """Handle validation errors"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
         content={
             "error": "Validation error",
@@ -79,14 +105,29 @@ async def validation_exception_handler(request: Request, exc: RequestValidationE
     )
 
 
+# Production error body is always the same, so serialize it once
+_PRODUCTION_500_JSON = orjson.dumps({
+    "error": "Internal server error",
+    "detail": "An error occurred",
+    "success": False
+})
+
+
 @app.exception_handler(Exception)
 async def general_exception_handler(request: Request, exc: Exception):
     """Handle general exceptions"""
-    return JSONResponse(
+    if not settings.DEBUG:
+        return Response(
+            _PRODUCTION_500_JSON,
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            media_type="application/json"
+        )
+
+    return ORJSONResponse(
         status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
         content={
             "error": "Internal server error",
-            "detail": str(exc) if settings.DEBUG else "An error occurred",
+            "detail": str(exc),
             "success": False
         }
     )
@@ -96,37 +137,48 @@ async def general_exception_handler(request: Request, exc: Exception):
 app.include_router(auth.router, prefix="/api")
 
 
+# Root and health responses never change, so serialize them once
+_ROOT_JSON = orjson.dumps({
+    "message": "Welcome to SehatGuru API",
+    "version": "1.0.0",
+    "status": "healthy",
+    "docs": "/docs"
+})
+_HEALTH_JSON = orjson.dumps({
+    "status": "healthy",
+    "environment": settings.ENVIRONMENT,
+    "version": "1.0.0"
+})
+
+
 # Root endpoint
 @app.get("/")
 async def root():
     """Root endpoint"""
-    return {
-        "message": "Welcome to SehatGuru API",
-        "version": "1.0.0",
-        "status": "healthy",
-        "docs": "/docs"
-    }
+    return Response(_ROOT_JSON, media_type="application/json")
 
 
 # Health check endpoint
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "environment": settings.ENVIRONMENT,
-        "version": "1.0.0"
-    }
-
-
-# Test page for Google OAuth (development only)
-@app.get("/test-google-auth")
-async def test_google_auth_page():
-    """Serve Google OAuth test page"""
-    file_path = os.path.join(os.path.dirname(__file__), "test_google_auth.html")
-    if os.path.exists(file_path):
-        return FileResponse(file_path)
-    return {"error": "Test file not found"}
+    return Response(_HEALTH_JSON, media_type="application/json")
+
+
+# Test page for Google OAuth (development only, not routed when DEBUG is off)
+if settings.DEBUG:
+    _TEST_PAGE_PATH = os.path.join(os.path.dirname(__file__), "test_google_auth.html")
+    _TEST_PAGE_HTML = None
+    if os.path.exists(_TEST_PAGE_PATH):
+        with open(_TEST_PAGE_PATH, "rb") as f:
+            _TEST_PAGE_HTML = f.read()
+
+    @app.get("/test-google-auth")
+    async def test_google_auth_page():
+        """Serve Google OAuth test page"""
+        if _TEST_PAGE_HTML is None:
+            return {"error": "Test file not found"}
+        return HTMLResponse(_TEST_PAGE_HTML, headers={"Cache-Control": "public, max-age=300"})
 
 
 if __name__ == "__main__":
@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Backfill the email index collection
+
+Writes an email_index entry for every user document, so existing accounts
+can be looked up by email without a query. Safe to run more than once.
+"""
+
+from app.config.firebase import firebase_client
+from app.utils.user_cache import email_index_ref
+
+# Firestore allows at most 500 writes per batch
+BATCH_SIZE = 500
+
+
+def main():
+    users_ref = firebase_client.users
+
+    batch = firebase_client.db.batch()
+    pending = 0
+    indexed = 0
+    skipped = 0
+
+    for user_doc in users_ref.select(["email"]).stream():
+        email = user_doc.get("email")
+        if not email:
+            skipped += 1
+            continue
+
+        batch.set(email_index_ref(email), {"uid": user_doc.id})
+        pending += 1
+        indexed += 1
+
+        if pending == BATCH_SIZE:
+            batch.commit()
+            batch = firebase_client.db.batch()
+            pending = 0
+
+    if pending:
+        batch.commit()
+
+    print(f"✅ Indexed {indexed} users ({skipped} without email skipped)")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,115 +4,112 @@ SehatGuru Auth Testing Script (Python)
 Tests all authentication endpoints
 """
 
-import requests
-import json
+import asyncio
+import httpx
+import orjson
 from typing import Dict
+from helpers import API_URL, JSON_HEADERS, print_section, print_response, log_failure
 
-API_URL = "http://localhost:8000/api/auth"
 EMAIL = "test@example.com"
 PASSWORD = "correct123"
 
 
-def print_section(title: str):
-    print("\n" + "=" * 50)
-    print(title)
-    print("=" * 50)
-
-
-def print_response(response: requests.Response):
-    try:
-        print(json.dumps(response.json(), indent=2))
-    except:
-        print(response.text)
-    print(f"Status: {response.status_code}")
-
-
-def main():
+async def main():
     print_section("SehatGuru Authentication Tests")
 
-    # 1. Login
-    print("\n1. Testing Login...")
-    login_response = requests.post(
-        f"{API_URL}/login",
-        json={"email": EMAIL, "password": PASSWORD}
-    )
-    print_response(login_response)
-
-    if login_response.status_code != 200:
-        print("\n❌ Login failed! Check your credentials.")
-        return
-
-    tokens = login_response.json()
-    access_token = tokens["access_token"]
-    refresh_token = tokens["refresh_token"]
-
-    print(f"\n✅ Login successful!")
-    print(f"Access Token: {access_token[:50]}...")
-    print(f"Refresh Token: {refresh_token[:50]}...")
-
-    # 2. Test /me with access token
-    print("\n2. Testing GET /me with access token...")
-    me_response = requests.get(
-        f"{API_URL}/me",
-        headers={"Authorization": f"Bearer {access_token}"}
-    )
-    print_response(me_response)
-
-    if me_response.status_code == 200:
-        print("✅ /me endpoint works!")
-    else:
-        print("❌ /me endpoint failed!")
-
-    # 3. Test refresh with refresh token
-    print("\n3. Testing POST /refresh with refresh token...")
-    refresh_response = requests.post(
-        f"{API_URL}/refresh",
-        headers={"Authorization": f"Bearer {refresh_token}"}
-    )
-    print_response(refresh_response)
-
-    if refresh_response.status_code == 200:
-        print("✅ Refresh endpoint works!")
-        new_tokens = refresh_response.json()
-        new_access_token = new_tokens["access_token"]
-        print(f"New Access Token: {new_access_token[:50]}...")
-    else:
-        print("❌ Refresh endpoint failed!")
-        return
-
-    # 4. Test logout
-    print("\n4. Testing POST /logout with access token...")
-    logout_response = requests.post(
-        f"{API_URL}/logout",
-        headers={"Authorization": f"Bearer {access_token}"}
-    )
-    print_response(logout_response)
-
-    if logout_response.status_code == 200:
-        print("✅ Logout successful!")
-    else:
-        print("❌ Logout failed!")
-
-    # 5. Try using logged-out token
-    print("\n5. Testing GET /me with logged-out token (should fail)...")
-    failed_me_response = requests.get(
-        f"{API_URL}/me",
-        headers={"Authorization": f"Bearer {access_token}"}
-    )
-    print_response(failed_me_response)
-
-    if failed_me_response.status_code == 401:
-        print("✅ Token correctly invalidated after logout!")
-    else:
-        print("❌ Token should have been invalidated!")
+    # One client (and keep-alive connection pool) for the whole run
+    async with httpx.AsyncClient(
+        base_url=API_URL,
+        timeout=httpx.Timeout(10.0, connect=3.05),
+        limits=httpx.Limits(max_keepalive_connections=16)
+    ) as client:
+        # 1. Login
+        print("\n1. Testing Login...")
+        login_response = await client.post(
+            "/login",
+            content=orjson.dumps({"email": EMAIL, "password": PASSWORD}),
+            headers=JSON_HEADERS
+        )
+        print_response(login_response)
+
+        if login_response.status_code != 200:
+            print("\n❌ Login failed! Check your credentials.")
+            log_failure(login_response)
+            return
+
+        tokens = orjson.loads(login_response.content)
+        access_token = tokens["access_token"]
+        refresh_token = tokens["refresh_token"]
+        auth_headers = {"Authorization": f"Bearer {access_token}"}
+        refresh_headers = {"Authorization": f"Bearer {refresh_token}"}
+
+        print(f"\n✅ Login successful!")
+        print(f"Access Token: {access_token[:50]}...")
+        print(f"Refresh Token: {refresh_token[:50]}...")
+
+        # 2 & 3. /me and /refresh don't depend on each other, so send both at once
+        me_response, refresh_response = await asyncio.gather(
+            client.get("/me", headers=auth_headers),
+            client.post("/refresh", headers=refresh_headers)
+        )
+
+        print("\n2. Testing GET /me with access token...")
+        print_response(me_response)
+
+        if me_response.status_code == 200:
+            print("✅ /me endpoint works!")
+        else:
+            print("❌ /me endpoint failed!")
+            log_failure(me_response)
+
+        print("\n3. Testing POST /refresh with refresh token...")
+        print_response(refresh_response)
+
+        if refresh_response.status_code == 200:
+            print("✅ Refresh endpoint works!")
+            new_tokens = orjson.loads(refresh_response.content)
+            new_access_token = new_tokens["access_token"]
+            print(f"New Access Token: {new_access_token[:50]}...")
+        else:
+            print("❌ Refresh endpoint failed!")
+            log_failure(refresh_response)
+            return
+
+        # 4. Test logout (must finish before the token is reused below)
+        print("\n4. Testing POST /logout with access token...")
+        logout_response = await client.post(
+            "/logout",
+            headers=auth_headers
+        )
+        print_response(logout_response)
+
+        if logout_response.status_code == 200:
+            print("✅ Logout successful!")
+        else:
+            print("❌ Logout failed!")
+            log_failure(logout_response)
+
+        # 5. Try using logged-out token
+        print("\n5. Testing GET /me with logged-out token (should fail)...")
+        failed_me_response = await client.get(
+            "/me",
+            headers=auth_headers
+        )
+        print_response(failed_me_response)
+
+        if failed_me_response.status_code == 401:
+            print("✅ Token correctly invalidated after logout!")
+        else:
+            print("❌ Token should have been invalidated!")
+            log_failure(failed_me_response)
 
     print_section("All Tests Completed! ✅")
 
 
 if __name__ == "__main__":
     try:
-        main()
-    except requests.exceptions.ConnectionError:
+        asyncio.run(main())
+    except httpx.ConnectError:
         print("\n❌ Could not connect to server!")
         print("Make sure the server is running: python main.py")
     except Exception as e:
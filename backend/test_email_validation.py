@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Test Email Validation
+
+Checks that the request models accept the addresses EmailStr accepted
+(IDN domains, Unicode and apostrophe local parts) and still reject
+malformed ones. Runs in-process; no server needed.
+"""
+
+import pytest
+from pydantic import ValidationError
+from app.models.auth import UserLogin
+
+VALID_EMAILS = [
+    "user@example.com",
+    "first.last+tag@sub.example.co.uk",
+    "o'neil@corp.com",
+    "user@example.xn--p1ai",
+    "user@xn--e1afmkfd.xn--p1ai",
+    "пользователь@пример.рф",
+    "josé@exämple.de",
+    "user@my-domain.io",
+]
+
+INVALID_EMAILS = [
+    "plainaddress",
+    "user@",
+    "@example.com",
+    "user@example",
+    "user@example.c",
+    "user@@example.com",
+    "user@example.123",
+    "user@-example.com",
+    "user@example-.com",
+    ".user@example.com",
+    "user..name@example.com",
+    "user name@example.com",
+    "user@example.com\n",
+    "a" * 250 + "@example.com",
+]
+
+
+@pytest.mark.parametrize("email", VALID_EMAILS)
+def test_valid_email_accepted(email):
+    assert UserLogin(email=email, password="secret").email == email
+
+
+@pytest.mark.parametrize("email", INVALID_EMAILS)
+def test_invalid_email_rejected(email):
+    with pytest.raises(ValidationError):
+        UserLogin(email=email, password="secret")
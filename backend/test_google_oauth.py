@@ -9,20 +9,13 @@ This script helps you test the Google OAuth endpoint by:
 """
 
 import requests
-import json
+import orjson
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from helpers import API_URL, make_session, post_json, print_section, print_response, log_failure
 
 
-API_URL = "http://localhost:8000/api/auth"
-
-
-def print_section(title: str):
-    print("\n" + "=" * 60)
-    print(title)
-    print("=" * 60)
-
-
-def test_google_auth(id_token: str):
+def check_google_auth(session: requests.Session, id_token: str):
     """Test Google OAuth endpoint with ID token"""
 
     print_section("Testing Google OAuth Endpoint")
@@ -32,20 +25,20 @@ def test_google_auth(id_token: str):
     print(f"Token preview: {id_token[:50]}...")
 
     try:
-        response = requests.post(
+        response = post_json(
+            session,
             f"{API_URL}/google",
-            json={"id_token": id_token}
+            {"id_token": id_token}
         )
 
-        print(f"\nStatus Code: {response.status_code}")
-        print(f"Response:")
-        print(json.dumps(response.json(), indent=2))
+        print_response(response)
 
         if response.status_code != 200:
             print("\n❌ Google authentication failed!")
+            log_failure(response)
             return
 
-        tokens = response.json()
+        tokens = orjson.loads(response.content)
         access_token = tokens.get("access_token")
         refresh_token = tokens.get("refresh_token")
 
@@ -53,40 +46,45 @@ def test_google_auth(id_token: str):
         print(f"Access Token: {access_token[:50]}...")
         print(f"Refresh Token: {refresh_token[:50]}...")
 
-        # Step 2: Test /me endpoint
-        print("\n2. Testing /me endpoint with access token...")
-        me_response = requests.get(
-            f"{API_URL}/me",
-            headers={"Authorization": f"Bearer {access_token}"}
-        )
+        auth_headers = {"Authorization": f"Bearer {access_token}"}
+        refresh_headers = {"Authorization": f"Bearer {refresh_token}"}
+
+        # Steps 2 & 3: /me and /refresh don't depend on each other, so send both at once
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            me_future = executor.submit(
+                session.get,
+                f"{API_URL}/me",
+                headers=auth_headers
+            )
+            refresh_future = executor.submit(
+                session.post,
+                f"{API_URL}/refresh",
+                headers=refresh_headers
+            )
+            me_response = me_future.result()
+            refresh_response = refresh_future.result()
 
-        print(f"\nStatus Code: {me_response.status_code}")
-        print(f"User Profile:")
-        print(json.dumps(me_response.json(), indent=2))
+        print("\n2. Testing /me endpoint with access token...")
+        print_response(me_response)
 
         if me_response.status_code == 200:
-            user_data = me_response.json()
+            user_data = orjson.loads(me_response.content)
             print("\n✅ User profile retrieved!")
             print(f"   Email: {user_data.get('email')}")
             print(f"   Name: {user_data.get('full_name')}")
             print(f"   Email Verified: {user_data.get('email_verified')}")
             print(f"   UID: {user_data.get('uid')}")
 
-        # Step 3: Test refresh token
         print("\n3. Testing refresh token endpoint...")
-        refresh_response = requests.post(
-            f"{API_URL}/refresh",
-            headers={"Authorization": f"Bearer {refresh_token}"}
-        )
-
         print(f"\nStatus Code: {refresh_response.status_code}")
 
         if refresh_response.status_code == 200:
-            new_tokens = refresh_response.json()
+            new_tokens = orjson.loads(refresh_response.content)
             print("\n✅ Token refresh successful!")
             print(f"New Access Token: {new_tokens.get('access_token')[:50]}...")
         else:
-            print(f"Response: {refresh_response.text}")
+            print("\n❌ Token refresh failed!")
+            log_failure(refresh_response)
 
         print_section("✅ All Google OAuth Tests Passed!")
 
@@ -99,7 +97,7 @@ def test_google_auth(id_token: str):
         traceback.print_exc()
 
 
-def main():
+def main(session: requests.Session):
     print_section("Google OAuth Token Tester")
     print("\nTo get a Google ID token, you have several options:")
     print("1. Open test_google_auth.html in your browser (easiest)")
@@ -109,7 +107,7 @@ def main():
     if len(sys.argv) > 1:
         # Token provided as command line argument
         id_token = sys.argv[1]
-        test_google_auth(id_token)
+        check_google_auth(session, id_token)
     else:
         # Ask for token
         print("\n" + "=" * 60)
@@ -126,8 +124,9 @@ def main():
             print("  python test_google_oauth.py <google_id_token>")
             return
 
-        test_google_auth(id_token)
+        check_google_auth(session, id_token)
 
 
 if __name__ == "__main__":
-    main()
+    with make_session() as session:
+        main(session)
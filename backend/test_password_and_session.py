@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Test Password Reset and Session Invalidation
+
+Runs the password reset flow once and verifies that the old password is
+rejected, the new one works, and all existing sessions (JWT tokens) are
+invalidated so the user must login again.
+"""
+
+import requests
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs
+import helpers
+from helpers import (
+    API_URL,
+    get_test_user,
+    delete_test_user,
+    make_session,
+    post_json,
+    print_section,
+    print_response,
+    log_failure
+)
+
+FULL_NAME = "Password Test User"
+EMAIL = "reset-test@example.com"
+OLD_PASSWORD = "oldpass123"
+NEW_PASSWORD = "newpass456"
+
+
+def extract_reset_token_from_link(link: str) -> str:
+    """Extract token from reset link (percent-decoded)"""
+    return parse_qs(urlparse(link).query).get("token", [None])[0]
+
+
+def run_flow(session: requests.Session, user: dict):
+    """
+    Run the reset flow and session checks for a registered, logged-in user
+
+    Stops at the first failed check with an AssertionError carrying the
+    response body, so pytest reports exactly which step broke.
+    """
+    old_auth_headers = {"Authorization": f"Bearer {user['access_token']}"}
+
+    # Steps 2 & 3 don't depend on each other, so send both at once
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        me_before_future = executor.submit(
+            session.get,
+            f"{API_URL}/me",
+            headers=old_auth_headers
+        )
+        forgot_future = executor.submit(
+            post_json,
+            session,
+            f"{API_URL}/forgot-password",
+            {"email": user["email"]}
+        )
+        me_response_before = me_before_future.result()
+        forgot_response = forgot_future.result()
+
+    # Step 2: Old token can access /me
+    assert me_response_before.status_code == 200, me_response_before.text
+
+    # Step 3: Request password reset
+    print_response(forgot_response)
+    assert forgot_response.status_code == 200, forgot_response.text
+
+    # Step 4: Reset password (the real token is only in the email, so use an equivalent one)
+    reset_response = post_json(
+        session,
+        f"{API_URL}/reset-password",
+        {
+            "token": helpers.reset_token(user["email"]),
+            "new_password": NEW_PASSWORD
+        }
+    )
+    assert reset_response.status_code == 200, reset_response.text
+
+    # Steps 5-7 only read state left by the reset, so send them at once
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        me_after_future = executor.submit(
+            session.get,
+            f"{API_URL}/me",
+            headers=old_auth_headers
+        )
+        old_login_future = executor.submit(
+            post_json,
+            session,
+            f"{API_URL}/login",
+            {"email": user["email"], "password": user["password"]}
+        )
+        new_login_future = executor.submit(
+            post_json,
+            session,
+            f"{API_URL}/login",
+            {"email": user["email"], "password": NEW_PASSWORD}
+        )
+        me_response_after = me_after_future.result()
+        old_login_attempt = old_login_future.result()
+        new_login_response = new_login_future.result()
+
+    # Step 5: Old token is rejected because the password changed
+    print_response(me_response_after)
+    assert me_response_after.status_code == 401, "old session still works after password reset"
+    detail = orjson.loads(me_response_after.content).get("detail", "")
+    assert "password was changed" in detail.lower(), me_response_after.text
+
+    # Step 6: Old password is rejected
+    assert old_login_attempt.status_code == 401, old_login_attempt.text
+
+    # Step 7: New password works
+    assert new_login_response.status_code == 200, new_login_response.text
+    new_access_token = orjson.loads(new_login_response.content)["access_token"]
+    new_auth_headers = {"Authorization": f"Bearer {new_access_token}"}
+
+    # Step 8: New token can access /me
+    me_response_new = session.get(
+        f"{API_URL}/me",
+        headers=new_auth_headers
+    )
+    assert me_response_new.status_code == 200, me_response_new.text
+
+
+def test_reset_invalidates_session(http_session, registered_user):
+    user = registered_user(FULL_NAME, EMAIL, OLD_PASSWORD)
+    run_flow(http_session, user)
+
+
+def main(session: requests.Session, keep_user: bool = False):
+    print_section("Password Reset & Session Invalidation Test")
+
+    # Step 1: Register and log in with OLD password
+    user = get_test_user(session, FULL_NAME, EMAIL, OLD_PASSWORD, keep_user)
+
+    try:
+        run_flow(session, user)
+    except AssertionError as e:
+        print(f"\n❌ {e}")
+        return
+
+    # Cleanup
+    if keep_user:
+        # Put the old password back so the next run can reuse the user
+        restore_response = post_json(
+            session,
+            f"{API_URL}/reset-password",
+            {"token": helpers.reset_token(EMAIL), "new_password": OLD_PASSWORD}
+        )
+        if restore_response.status_code != 200:
+            print("❌ Could not restore OLD password")
+            log_failure(restore_response)
+    else:
+        delete_test_user(session, EMAIL)
+
+    print_section("✅ ALL PASSWORD RESET & SESSION INVALIDATION TESTS PASSED!")
+    print("\nSummary:")
+    print("  ✅ Password reset requested and completed")
+    print("  ✅ Old session invalidated after password reset")
+    print("  ✅ Old password rejected")
+    print("  ✅ New password works")
+    print("  ✅ New session works")
+
+
+if __name__ == "__main__":
+    args = helpers.parse_test_args("Password reset and session invalidation test")
+    try:
+        with make_session() as session:
+            main(session, keep_user=args.keep_user)
+    except requests.exceptions.ConnectionError:
+        print("\n❌ Could not connect to server!")
+        print("Make sure the server is running: python main.py")
+    except Exception as e:
+        print(f"\n❌ Error: {str(e)}")
+        import traceback
+        traceback.print_exc()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+"""
+Test Session Invalidation Around a Password Change
+
+Tokens carry a sub-second iat, so a token issued earlier in the same
+second as a password change is rejected while one issued later in that
+second is accepted. Runs in-process; no server needed.
+"""
+
+import math
+from app.middleware.auth import password_changed_after
+from app.utils.jwt import create_token_pair, verify_token
+
+
+def _issued_at() -> float:
+    """iat of a freshly issued access token"""
+    access_token, _ = create_token_pair("iat-test-uid", "iat-test@example.com")
+    return verify_token(access_token, token_type="access").iat
+
+
+def test_token_from_same_second_before_change_is_rejected():
+    iat = _issued_at()
+    # Password changed later in the same second the token was issued
+    changed_at = (iat + math.floor(iat) + 1) / 2
+
+    assert math.floor(changed_at) == math.floor(iat)
+    assert password_changed_after({"password_changed_at_ts": changed_at}, iat)
+
+
+def test_token_from_same_second_after_change_is_accepted():
+    iat = _issued_at()
+    # Password changed earlier in the same second the token was issued
+    changed_at = (math.floor(iat) + iat) / 2
+
+    assert math.floor(changed_at) == math.floor(iat)
+    assert not password_changed_after({"password_changed_at_ts": changed_at}, iat)